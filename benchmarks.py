@@ -0,0 +1,131 @@
+"""Micro-benchmarks hors réseau des étapes du scraper."""
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+from selectolax.parser import HTMLParser
+
+from details import extraire_details
+from normalisation import normaliser_nom
+from variantes import compter_variantes_exhaustives, planifier_variantes
+
+
+NOMS_EXEMPLES = [
+    "Neymar",
+    "Vinicius Junior",
+    "Lucas Tolentino Paqueta",
+    "Ederson Santana de Moraes",
+    "Carlos Henrique Casimiro da Silva",
+    "Ricardo Izecson dos Santos Leite Kaka",
+]
+
+
+def benchmark_variantes():
+    """Compare le nombre de requêtes générées par nom selon le nombre de tokens."""
+    print(f"{'Tokens':>6} | {'Exhaustif':>9} | {'Planifié':>8} | Nom")
+    for nom in NOMS_EXEMPLES:
+        nombre_tokens = len(nom.split())
+        print(f"{nombre_tokens:>6} | {compter_variantes_exhaustives(nombre_tokens):>9} | "
+              f"{len(planifier_variantes(nom.lower())):>8} | {nom}")
+
+
+# Noms tels qu'ils apparaissent dans les tableaux de résultats Transfermarkt
+NOMS_TRANSFERMARKT = NOMS_EXEMPLES + [
+    "Kylian Mbappé", "Rúben Dias", "Ørjan Nyland", "Jérôme Boateng",
+    "İlkay Gündoğan", "Martin Ødegaard", "Dušan Vlahović", "Çağlar Söyüncü",
+    "Ousmane Dembélé", "N'Golo Kanté", "Jean-Philippe Mateta", "Kæmpe Sørensen",
+    "Luka Modrić", "Wojciech Szczęsny", "Toni Kroos", "Son Heung-min",
+]
+
+
+def _normaliser_nom_reference(nom_joueur: str) -> str:
+    """Ancienne implémentation de ScraperTransferMarkt._normaliser_nom."""
+    nom_joueur = nom_joueur.replace('æ', 'ae').replace('Æ', 'AE')
+    nom_joueur = ''.join(
+        c for c in unicodedata.normalize('NFD', nom_joueur) if unicodedata.category(c) != 'Mn'
+    )
+    nom_joueur_nettoyer = re.sub(r"[^a-zA-Z0-9\s\-]", "", nom_joueur).lower().strip()
+    return nom_joueur_nettoyer.replace("-", " ")
+
+
+def benchmark_normalisation(repetitions: int = 2000):
+    """Compare l'ancienne normalisation et `normaliser_nom` (sans puis avec mémo)."""
+    corpus = NOMS_TRANSFERMARKT * repetitions
+    for nom in NOMS_TRANSFERMARKT:
+        assert normaliser_nom(nom) == _normaliser_nom_reference(nom), nom
+
+    def chronometrer(fonction):
+        debut = time.perf_counter()
+        for nom in corpus:
+            fonction(nom)
+        return time.perf_counter() - debut
+
+    reference = chronometrer(_normaliser_nom_reference)
+    sans_memo = chronometrer(normaliser_nom.__wrapped__)
+    normaliser_nom.cache_clear()
+    avec_memo = chronometrer(normaliser_nom)
+    print(f"Normalisation de {len(corpus)} noms :")
+    print(f"- référence : {reference * 1000:.0f} ms")
+    print(f"- table de traduction : {sans_memo * 1000:.0f} ms")
+    print(f"- table de traduction + mémo : {avec_memo * 1000:.0f} ms")
+
+
+def _details_reference(html_details: str):
+    """Anciens parseurs de la page de détails : un HTMLParser, balayage de tous les spans."""
+    html = HTMLParser(html_details)
+    date_naissance = None
+    for item in html.css('div.data-header__details ul.data-header__items li'):
+        if 'Naissance' in item.text():
+            span = item.css_first('span[itemprop="birthDate"]')
+            if span:
+                date_naissance = span.text(strip=True).split('(')[0].strip()
+                break
+
+    fin_contrat = '?'
+    spans = html.css('span')
+    for i, span in enumerate(spans):
+        if "Contrat jusqu'à:" in span.text(strip=True):
+            if i + 1 < len(spans):
+                fin_contrat = spans[i + 1].text(strip=True) or '?'
+                if fin_contrat == '-':
+                    fin_contrat = '?'
+            break
+    return fin_contrat, date_naissance
+
+
+def benchmark_details(dossier_pages, repetitions: int = 20):
+    """Compare les deux analyses sur des pages de détails sauvegardées (*.html) dans `dossier_pages`."""
+    pages = [chemin.read_text(encoding="utf-8") for chemin in sorted(Path(dossier_pages).glob("*.html"))]
+    if not pages:
+        print(f"Aucune page de détails dans {dossier_pages}")
+        return
+
+    differences = 0
+    for html in pages:
+        details = extraire_details(html)
+        if (details.fin_contrat or '?', details.date_naissance) != _details_reference(html):
+            differences += 1
+
+    def chronometrer(fonction):
+        debut = time.perf_counter()
+        for _ in range(repetitions):
+            for html in pages:
+                fonction(html)
+        return time.perf_counter() - debut
+
+    reference = chronometrer(_details_reference)
+    extraction = chronometrer(extraire_details)
+    total = len(pages) * repetitions
+    print(f"Analyse de {total} pages de détails ({len(pages)} fichiers) :")
+    print(f"- référence : {reference / total * 1000:.2f} ms par page")
+    print(f"- extraire_details : {extraction / total * 1000:.2f} ms par page")
+    print(f"- pages dont la fin de contrat ou la date de naissance diffère : {differences}")
+
+
+if __name__ == "__main__":
+    benchmark_variantes()
+    benchmark_normalisation()
+    if len(sys.argv) > 1:
+        benchmark_details(sys.argv[1])
@@ -0,0 +1,121 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+# Au-delà, une page périmée n'est plus utile ni à la revalidation par ETag ni au
+# rejeu hors ligne
+DUREE_CONSERVATION = 30 * 24 * 3600
+
+
+@dataclass
+class PageEnCache:
+    url: str
+    html: str
+    empreinte: str
+    recupere_le: float
+    etag: Optional[str] = None
+
+
+class CachePages:
+    """
+    Cache du HTML brut des pages, indexé par URL.
+
+    Le contenu est stocké compressé et adressé par son empreinte SHA-256 : deux URLs
+    qui renvoient la même page (variantes de recherche équivalentes) partagent un
+    seul enregistrement. `purger` supprime les pages trop anciennes et les contenus
+    que plus aucune page ne référence.
+    """
+
+    def __init__(self, db_path="pages.db"):
+        self._db_path = db_path
+        self._thread_local = threading.local()
+        self._connexions = []
+        self._verrou = threading.Lock()
+        self._create_tables()
+
+    def _get_connection(self):
+        if not hasattr(self._thread_local, 'connection'):
+            connexion = sqlite3.connect(self._db_path, check_same_thread=False, timeout=30)
+            connexion.execute("PRAGMA journal_mode=WAL")
+            self._thread_local.connection = connexion
+            with self._verrou:
+                self._connexions.append(connexion)
+        return self._thread_local.connection
+
+    def _create_tables(self):
+        conn = self._get_connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS contenus (
+                    empreinte TEXT PRIMARY KEY,
+                    html BLOB
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    empreinte TEXT REFERENCES contenus(empreinte),
+                    recupere_le REAL,
+                    etag TEXT
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS pages_empreinte ON pages (empreinte)")
+
+    def obtenir(self, url: str) -> Optional[PageEnCache]:
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT p.empreinte, p.recupere_le, p.etag, c.html FROM pages p "
+            "JOIN contenus c ON c.empreinte = p.empreinte WHERE p.url = ?", (url,)).fetchone()
+        if not row:
+            return None
+        empreinte, recupere_le, etag, html = row
+        return PageEnCache(url, zlib.decompress(html).decode("utf-8"), empreinte, recupere_le, etag)
+
+    def definir(self, url: str, html: str, etag: Optional[str] = None) -> str:
+        """Enregistre le HTML d'une URL et retourne son empreinte."""
+        contenu = html.encode("utf-8")
+        empreinte = hashlib.sha256(contenu).hexdigest()
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO contenus (empreinte, html) VALUES (?, ?)",
+                (empreinte, zlib.compress(contenu, 6)))
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url, empreinte, recupere_le, etag) VALUES (?, ?, ?, ?)",
+                (url, empreinte, time.time(), etag))
+        return empreinte
+
+    def rafraichir(self, url: str):
+        """Marque une page comme revalidée sans changer son contenu."""
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
+                "UPDATE pages SET recupere_le = ? WHERE url = ?", (time.time(), url))
+
+    def purger(self, duree_conservation: float = DUREE_CONSERVATION) -> Tuple[int, int]:
+        """
+        Supprime les pages récupérées il y a plus de `duree_conservation` secondes, puis
+        les contenus orphelins. Retourne le nombre de pages et de contenus supprimés.
+        """
+        conn = self._get_connection()
+        with conn:
+            pages = conn.execute(
+                "DELETE FROM pages WHERE recupere_le < ?",
+                (time.time() - duree_conservation,)).rowcount
+            contenus = conn.execute(
+                "DELETE FROM contenus WHERE NOT EXISTS "
+                "(SELECT 1 FROM pages WHERE pages.empreinte = contenus.empreinte)").rowcount
+        return pages, contenus
+
+    def fermer(self):
+        with self._verrou:
+            for connexion in self._connexions:
+                connexion.close()
+            self._connexions = []
+        self._thread_local = threading.local()
@@ -0,0 +1,115 @@
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class VolUnique:
+    """
+    Regroupe les appels identiques lancés en même temps par plusieurs threads.
+
+    Le premier appelant d'une clé exécute la fonction, les suivants attendent son
+    résultat (ou son exception) au lieu de relancer le même travail. La clé est
+    libérée dès la fin de l'appel : il ne s'agit pas d'un cache.
+    """
+
+    def __init__(self):
+        self._en_vol: Dict[Hashable, Future] = {}
+        self._verrou = threading.Lock()
+        self.appels_partages = 0
+
+    def executer(self, cle: Hashable, fonction: Callable[[], Any]) -> Any:
+        with self._verrou:
+            future = self._en_vol.get(cle)
+            proprietaire = future is None
+            if proprietaire:
+                future = Future()
+                self._en_vol[cle] = future
+            else:
+                self.appels_partages += 1
+
+        if not proprietaire:
+            return future.result()
+
+        try:
+            resultat = fonction()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(resultat)
+            return resultat
+        finally:
+            with self._verrou:
+                del self._en_vol[cle]
+
+
+class LimiteurDebit:
+    """
+    Seau à jetons partagé par tous les workers, au débit adaptatif.
+
+    Chaque requête réseau consomme un jeton. Une erreur, un challenge anti-bot ou
+    une série de pages vides divise le débit par deux et vide le seau ; chaque
+    succès le fait remonter par petits pas jusqu'à `debit_max` (AIMD).
+    """
+
+    def __init__(self, debit: float = 4.0, capacite: Optional[float] = None,
+                 debit_min: float = 0.2, debit_max: Optional[float] = None,
+                 facteur_ralentissement: float = 0.5, seuil_pages_vides: int = 3):
+        self.debit = debit
+        self.debit_min = debit_min
+        self.debit_max = debit_max or debit
+        self.capacite = capacite or max(1.0, debit)
+        self.facteur_ralentissement = facteur_ralentissement
+        self.seuil_pages_vides = seuil_pages_vides
+        self.ralentissements = Counter()
+        self._pas_acceleration = self.debit_max / 50
+        self._jetons = self.capacite
+        self._dernier_remplissage = time.monotonic()
+        self._pages_vides_consecutives = 0
+        self._verrou = threading.Lock()
+
+    def _remplir(self):
+        maintenant = time.monotonic()
+        self._jetons = min(
+            self.capacite, self._jetons + (maintenant - self._dernier_remplissage) * self.debit)
+        self._dernier_remplissage = maintenant
+
+    def acquerir(self):
+        """Bloque jusqu'à ce qu'un jeton soit disponible, puis le consomme."""
+        while True:
+            with self._verrou:
+                self._remplir()
+                if self._jetons >= 1:
+                    self._jetons -= 1
+                    return
+                attente = (1 - self._jetons) / self.debit
+            time.sleep(attente)
+
+    def signaler_succes(self):
+        with self._verrou:
+            self.debit = min(self.debit_max, self.debit + self._pas_acceleration)
+
+    def signaler_echec(self, raison: str):
+        with self._verrou:
+            self._remplir()
+            self.debit = max(self.debit_min, self.debit * self.facteur_ralentissement)
+            self._jetons = 0
+            self.ralentissements[raison] += 1
+
+    def signaler_page(self, vide: bool):
+        """Compte les pages de résultats vides consécutives, signe possible d'un blocage silencieux."""
+        with self._verrou:
+            self._pages_vides_consecutives = self._pages_vides_consecutives + 1 if vide else 0
+            serie = self._pages_vides_consecutives >= self.seuil_pages_vides
+            if serie:
+                self._pages_vides_consecutives = 0
+        if serie:
+            self.signaler_echec("pages vides")
+
+
+def delai_reessai(tentative: int, base: float = 5.0, maximum: float = 120.0) -> float:
+    """Délai exponentiel avant la tentative `tentative` (1, 2, ...), avec une gigue de ±50 %."""
+    return min(maximum, base * 2 ** (tentative - 1)) * random.uniform(0.5, 1.5)
@@ -0,0 +1,39 @@
+"""Score de similarité entre un nom recherché et des noms candidats, calculé par lots."""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+
+SCORERS = (fuzz.token_sort_ratio, fuzz.partial_ratio, fuzz.token_set_ratio)
+
+# En dessous, démarrer les threads de rapidfuzz coûte plus cher que le calcul lui-même
+# (une page de recherche Transfermarkt compte une dizaine de lignes).
+MIN_CANDIDATS_PARALLELE = 500
+
+
+def scores_candidats(nom_normalise: str, candidats: Sequence[str], seuil: float = 0) -> np.ndarray:
+    """
+    Score de chaque candidat : maximum de token_sort_ratio, partial_ratio et token_set_ratio.
+
+    Les scores inférieurs à `seuil` valent 0 ; rapidfuzz abandonne ces calculs dès
+    qu'il sait que le seuil ne sera pas atteint.
+    """
+    if not candidats:
+        return np.zeros(0)
+
+    workers = -1 if len(candidats) >= MIN_CANDIDATS_PARALLELE else 1
+    return np.maximum.reduce([
+        process.cdist([nom_normalise], candidats, scorer=scorer, score_cutoff=seuil,
+                      dtype=np.float64, workers=workers)[0]
+        for scorer in SCORERS
+    ])
+
+
+def classer_candidats(nom_normalise: str, candidats: Sequence[str],
+                      seuil: float) -> List[Tuple[int, float]]:
+    """Indices et scores des candidats atteignant `seuil`, du meilleur au moins bon (tri stable)."""
+    scores = scores_candidats(nom_normalise, candidats, seuil)
+    indices = np.flatnonzero(scores >= seuil) if seuil > 0 else np.arange(len(scores))
+    ordre = indices[np.argsort(-scores[indices], kind="stable")]
+    return [(int(i), float(scores[i])) for i in ordre]
@@ -0,0 +1,133 @@
+"""
+Extraction des informations de la page de détails d'un joueur Transfermarkt.
+
+Seule la portion du document allant de l'en-tête du joueur à la fin du tableau
+d'informations est analysée. Les nœuds utiles y sont sélectionnés par un seul
+sélecteur groupé puis répartis en un passage, au lieu de parcourir toutes les
+balises <span> de la page.
+"""
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from selectolax.lexbor import LexborHTMLParser
+
+
+MARQUEUR_CONTRAT = "Contrat jusqu'à:"
+MARQUEUR_POSITION = "Position:"
+DEBUT_ENTETE = '<header'
+FIN_TABLEAU_INFOS = 'info-table__content'
+
+_VALEUR_MARCHE = re.compile(r"(\d+(?:,\d+)?)\s*(mio\.|K)")
+
+_SELECTEUR_DETAILS = ", ".join([
+    'span[itemprop="birthDate"]',
+    'span.data-header__club a',
+    'a.data-header__market-value-wrapper',
+    'li.data-header__label',
+    'span.info-table__content--regular',
+])
+
+
+@dataclass
+class DetailsJoueur:
+    fin_contrat: Optional[str] = None
+    date_naissance: Optional[str] = None
+    club: Optional[str] = None
+    position: Optional[str] = None
+    valeur: Optional[float] = None
+
+
+def parser_valeur_marche(valeur_texte: str) -> float:
+    """'180,00 mio. €' -> 180.0, '500 K €' -> 0.5 (en millions), 0.0 si illisible."""
+    match = _VALEUR_MARCHE.search(valeur_texte)
+    if not match:
+        return 0.0
+    valeur, unite = match.groups()
+    valeur = float(valeur.replace(",", "."))
+    return valeur if unite == "mio." else valeur / 1000
+
+
+def _normaliser_fin_contrat(texte: str) -> str:
+    return '?' if texte == '-' or not texte else texte
+
+
+def _span_suivant(noeud):
+    suivant = noeud.next
+    while suivant is not None and suivant.tag != 'span':
+        suivant = suivant.next
+    return suivant
+
+
+def _portion_utile(html: str) -> str:
+    """De l'en-tête du joueur à la fin du tableau d'informations, ou toute la page si introuvables."""
+    debut = html.find(DEBUT_ENTETE)
+    dernier_contenu = html.rfind(FIN_TABLEAU_INFOS)
+    if debut == -1 or dernier_contenu < debut:
+        return html
+    fin = html.find('</div>', dernier_contenu)
+    return html[debut:] if fin == -1 else html[debut:fin]
+
+
+def _fin_contrat_par_balayage(arbre: LexborHTMLParser) -> Optional[str]:
+    """Repli pour les pages sans tableau d'informations : span suivant le libellé du contrat."""
+    spans = arbre.css('span')
+    for i, span in enumerate(spans):
+        if MARQUEUR_CONTRAT in span.text(strip=True):
+            if i + 1 < len(spans):
+                return _normaliser_fin_contrat(spans[i + 1].text(strip=True))
+    return None
+
+
+def extraire_details(html: str, chercher_fin_contrat: bool = True) -> DetailsJoueur:
+    """
+    Fin de contrat, date de naissance, club, position et valeur marchande ; None si absents.
+
+    Sans `chercher_fin_contrat` (joueurs en fin de carrière), le balayage de repli
+    des spans n'est pas effectué.
+    """
+    portion = _portion_utile(html)
+    arbre = LexborHTMLParser(portion)
+    details = DetailsJoueur()
+
+    for noeud in arbre.css(_SELECTEUR_DETAILS):
+        classes = noeud.attributes.get('class') or ''
+
+        if noeud.attributes.get('itemprop') == 'birthDate':
+            if details.date_naissance is None:
+                details.date_naissance = noeud.text(strip=True).split('(')[0].strip()
+
+        elif 'data-header__market-value-wrapper' in classes:
+            if details.valeur is None:
+                details.valeur = parser_valeur_marche(noeud.text(strip=True))
+
+        elif noeud.tag == 'a':
+            if details.club is None:
+                details.club = noeud.attributes.get('title') or noeud.text(strip=True)
+
+        elif noeud.tag == 'li':
+            libelle = noeud.text(strip=True)
+            contenu = noeud.css_first('span.data-header__content')
+            if contenu is None:
+                continue
+            if MARQUEUR_POSITION in libelle and details.position is None:
+                details.position = contenu.text(strip=True)
+            elif MARQUEUR_CONTRAT in libelle and details.fin_contrat is None:
+                details.fin_contrat = _normaliser_fin_contrat(contenu.text(strip=True))
+
+        else:
+            libelle = noeud.text(strip=True)
+            valeur = _span_suivant(noeud)
+            if valeur is None:
+                continue
+            if MARQUEUR_CONTRAT in libelle and details.fin_contrat is None:
+                details.fin_contrat = _normaliser_fin_contrat(valeur.text(strip=True))
+            elif MARQUEUR_POSITION in libelle and details.position is None:
+                details.position = valeur.text(strip=True)
+
+    if details.fin_contrat is None and chercher_fin_contrat:
+        if portion is not html:
+            arbre = LexborHTMLParser(html)
+        details.fin_contrat = _fin_contrat_par_balayage(arbre)
+
+    return details
@@ -0,0 +1,83 @@
+"""Écriture des DataFrames en XLSX mis en forme, en une seule passe sur le disque."""
+from typing import Dict, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+
+REMPLISSAGE_JAUNE = PatternFill(start_color="FFFF00",
+                                end_color="FFFF00",
+                                fill_type="solid")
+TAILLE_ECHANTILLON = 100_000
+
+
+def largeurs_colonnes(df: pd.DataFrame, largeur_max: Optional[int] = None,
+                      taille_echantillon: int = TAILLE_ECHANTILLON) -> Dict[str, int]:
+    """
+    Largeur de chaque colonne : plus longue valeur affichée (en-tête compris) + 2.
+
+    Au-delà de `taille_echantillon` lignes, les longueurs sont mesurées sur un
+    échantillon fixe de lignes plutôt que sur toute la colonne.
+    """
+    if len(df) > taille_echantillon:
+        df = df.sample(n=taille_echantillon, random_state=0)
+
+    largeurs = {}
+    for colonne in df.columns:
+        valeurs = df[colonne].dropna()
+        plus_longue = int(valeurs.astype(str).str.len().max()) if len(valeurs) else 0
+        largeur = max(plus_longue, len(str(colonne))) + 2
+        largeurs[colonne] = min(largeur, largeur_max) if largeur_max else largeur
+    return largeurs
+
+
+def _cellule_entete(feuille, valeur) -> WriteOnlyCell:
+    cellule = WriteOnlyCell(feuille, value=valeur)
+    cellule.font = Font(bold=True)
+    bord = Side(style="thin")
+    cellule.border = Border(left=bord, right=bord, top=bord, bottom=bord)
+    cellule.alignment = Alignment(horizontal="center", vertical="top")
+    return cellule
+
+
+def ecrire_xlsx(df: pd.DataFrame, chemin, nom_feuille: str = "Sheet1",
+                largeur_max: Optional[int] = None,
+                lignes_surlignees: Optional[pd.Series] = None,
+                remplissage: PatternFill = REMPLISSAGE_JAUNE):
+    """
+    Écrit `df` dans un classeur en mode write-only, largeurs de colonnes comprises.
+
+    Les largeurs sont calculées sur le DataFrame avant l'écriture : le fichier est
+    écrit une seule fois, sans relecture par load_workbook. Les lignes dont le
+    masque `lignes_surlignees` vaut True reçoivent le `remplissage`.
+    """
+    largeurs = largeurs_colonnes(df, largeur_max)
+
+    classeur = Workbook(write_only=True)
+    feuille = classeur.create_sheet(nom_feuille)
+    for i, colonne in enumerate(df.columns, 1):
+        feuille.column_dimensions[get_column_letter(i)].width = largeurs[colonne]
+
+    feuille.append([_cellule_entete(feuille, colonne) for colonne in df.columns])
+
+    valeurs = df.astype(object).where(df.notna(), None)
+    if lignes_surlignees is None:
+        surlignees = [False] * len(df)
+    else:
+        surlignees = lignes_surlignees.fillna(False).astype(bool).tolist()
+
+    for ligne, surlignee in zip(valeurs.itertuples(index=False, name=None), surlignees):
+        if surlignee:
+            cellules = []
+            for valeur in ligne:
+                cellule = WriteOnlyCell(feuille, value=valeur)
+                cellule.fill = remplissage
+                cellules.append(cellule)
+            feuille.append(cellules)
+        else:
+            feuille.append(ligne)
+
+    classeur.save(chemin)
@@ -1,7 +1,15 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from openpyxl import load_workbook
+
+from formatage import ecrire_xlsx
 
 mois_fr = {
     1: "janvier", 2: "février", 3: "mars", 4: "avril",
@@ -10,94 +18,166 @@ mois_fr = {
 }
 mois_fr_inverse = {v: k for k, v in mois_fr.items()}
 
+EXTENSIONS_EXCEL = ['.xls', '.xlsx']
+COLONNES_FUSION = ['NOM', 'DOB', 'DATE', 'VALEUR', 'NOM2']
+
+FORMATS_DATE = [
+    '%d-%b-%Y', '%d/%m/%Y', '%Y-%m-%d',
+    '%d-%m-%Y', '%m/%d/%Y', '%Y/%m/%d',
+    '%d %m %Y', '%d.%m.%Y', '%Y-%m-%d %H:%M:%S'
+]
 
-def convertir_date(date_obj):
-    """
-    Convertit une date au format standard.
-    """
-    if isinstance(date_obj, (datetime, pd.Timestamp)):
-        return date_obj
 
-    if pd.isna(date_obj):
-        return None
+def _mois_fr_en_chiffre(date_str):
+    """'25 août 1996' -> '25 8 1996'."""
+    jour, mois, annee = date_str.split(' ')
+    return f"{jour} {mois_fr_inverse[mois.lower()]} {annee}"
 
-    date_obj = str(date_obj).strip()
 
+def convertir_date_texte(date_str):
+    """
+    Convertit une date texte ('25 août 1996' ou l'un des FORMATS_DATE) en datetime,
+    ou None si aucun format ne convient.
+    """
     try:
+        return datetime.strptime(_mois_fr_en_chiffre(date_str), '%d %m %Y')
+    except (ValueError, KeyError):
+        pass
+
+    for fmt in FORMATS_DATE:
         try:
-            jour, mois, annee = date_obj.split(' ')
-            mois_num = mois_fr_inverse[mois.lower()]
-            date_str = f"{jour} {mois_num} {annee}"
-            return datetime.strptime(date_str, '%d %m %Y')
-        except (ValueError, KeyError):
-            pass
-
-        formats = [
-            '%d-%b-%Y', '%d/%m/%Y', '%Y-%m-%d',
-            '%d-%m-%Y', '%m/%d/%Y', '%Y/%m/%d',
-            '%d %m %Y', '%d.%m.%Y'
-        ]
-
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_obj, fmt)
-            except (ValueError, AttributeError):
-                continue
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    return None
 
-        raise ValueError(f"Impossible de convertir la date : {date_obj}")
 
-    except Exception as e:
-        print(str(e))
-        return None
+def normaliser_dates_fr(dates):
+    """
+    Convertit une colonne de dates texte au format '25 août 1996'.
 
-def formater_date_fr(date_obj):
+    Chaque valeur distincte n'est convertie qu'une fois, puis le résultat est
+    redistribué sur la colonne. Les conversions restent des datetime Python : les
+    dates hors de la plage des Timestamp pandas (avant 1677, par exemple) sont
+    conservées. Les dates non reconnues deviennent NaN.
     """
-    Formate une date (datetime) au format '25 août 1996'.
+    textes = {}
+    for valeur in pd.unique(dates.dropna()):
+        date_str = str(valeur).strip()
+        date_obj = convertir_date_texte(date_str)
+        if date_obj is None:
+            if date_str:
+                print(f"Impossible de convertir la date : {date_str}")
+            continue
+        textes[valeur] = f"{date_obj.day} {mois_fr[date_obj.month]} {date_obj.year}"
+    return dates.map(textes)
+
+
+def lire_fichier_resultats(fichier):
+    """
+    Lit un fichier de résultats et normalise sa colonne DOB.
+
+    Fonction de module pour pouvoir être exécutée dans un processus séparé.
     """
-    if pd.isna(date_obj):
-        return None
+    df = pd.read_excel(
+        fichier,
+        usecols=COLONNES_FUSION,
+        dtype={colonne: str for colonne in COLONNES_FUSION}
+    )
+
+    df['DOB'] = normaliser_dates_fr(df['DOB'])
+
+    return df
+
 
-    jour = date_obj.day
-    mois = mois_fr[date_obj.month]
-    annee = date_obj.year
-    return f"{jour} {mois} {annee}"
+def _cle_cache(fichier):
+    """Clé du cache d'un fichier : chemin, taille et date de modification."""
+    stat = fichier.stat()
+    identite = f"{fichier.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(identite.encode("utf-8")).hexdigest()
 
 
-def fusionner_fichiers_excel(dossier_entree, fichier_sortie):
+def _lister_fichiers_excel(dossier_entree, dossier_exclu=None):
+    return sorted(
+        fichier for fichier in Path(dossier_entree).rglob('*')
+        if fichier.suffix.lower() in EXTENSIONS_EXCEL
+        and (dossier_exclu is None or dossier_exclu not in fichier.parents)
+    )
+
+
+def _lire_en_parallele(fichiers, max_processus=None):
+    """Lit `fichiers` dans un pool de processus ; produit (fichier, df, erreur) au fil de l'eau."""
+    with ProcessPoolExecutor(max_workers=max_processus) as executeur:
+        futures = {executeur.submit(lire_fichier_resultats, fichier): fichier
+                   for fichier in fichiers}
+        for future in as_completed(futures):
+            fichier = futures[future]
+            try:
+                yield fichier, future.result(), None
+            except Exception as e:
+                yield fichier, None, e
+
+
+def fusionner_fichiers_excel(dossier_entree, fichier_sortie, dossier_cache=None,
+                             max_processus=None):
     """
     Fusionne tous les fichiers Excel dans un dossier en un seul fichier.
-    
+
+    Les fichiers sont lus en parallèle dans un pool de processus. Chaque DataFrame
+    normalisé est conservé dans `dossier_cache` (pickle) sous une clé dérivée du
+    chemin, de la taille et de la date de modification : seuls les fichiers
+    nouveaux ou modifiés sont relus lors des fusions suivantes.
+
     :param dossier_entree: Chemin du dossier contenant les fichiers Excel
     :param fichier_sortie: Chemin du fichier Excel de sortie
+    :param dossier_cache: Dossier du cache (par défaut `<dossier_entree>/.cache_fusion`)
+    :param max_processus: Nombre de processus de lecture (par défaut, un par cœur)
     """
-    dataframes = []
+    dossier_cache = Path(dossier_cache or Path(dossier_entree) / ".cache_fusion")
+    dossier_cache.mkdir(parents=True, exist_ok=True)
+
+    fichiers = _lister_fichiers_excel(dossier_entree, dossier_cache)
+
+    dataframes = {}
+    caches_utilises = set()
+    a_lire = {}
 
     total_fichiers_traites = 0
     total_fichiers_echoues = 0
+    total_fichiers_en_cache = 0
 
-    for fichier in Path(dossier_entree).rglob('*'):
-        if fichier.suffix.lower() in ['.xls', '.xlsx']:
+    for fichier in fichiers:
+        chemin_cache = dossier_cache / f"{_cle_cache(fichier)}.pkl"
+        caches_utilises.add(chemin_cache.name)
+        if chemin_cache.exists():
             try:
-                df = pd.read_excel(
-                    fichier,
-                    usecols=['NOM', 'DOB', 'DATE', 'VALEUR', 'NOM2'],
-                    dtype={'NOM': str, 'DOB': str, 'DATE': str,
-                           'VALEUR': str, 'NOM2': str}
-                )
-
-                df['DOB'] = df['DOB'].fillna('').apply(convertir_date)
+                dataframes[fichier] = pd.read_pickle(chemin_cache)
+                total_fichiers_en_cache += 1
+                continue
+            except Exception as e:
+                print(f"Cache illisible pour {fichier.name}, relecture : {e}")
+        a_lire[fichier] = chemin_cache
 
-                df['DOB'] = df[df['DOB'].notna()]['DOB'].apply(formater_date_fr)
+    if a_lire:
+        for fichier, df, erreur in _lire_en_parallele(a_lire, max_processus):
+            if erreur is not None:
+                print(
+                    f"Erreur lors du traitement du fichier {fichier.name}: {erreur}")
+                total_fichiers_echoues += 1
+                continue
 
-                dataframes.append(df)
+            df.to_pickle(a_lire[fichier])
+            dataframes[fichier] = df
+            total_fichiers_traites += 1
+            print(f"Fichier traité avec succès : {fichier.name}")
 
-                total_fichiers_traites += 1
-                print(f"Fichier traité avec succès : {fichier.name}")
+    # Entrées de fichiers supprimés ou modifiés depuis la dernière fusion
+    for chemin_cache in dossier_cache.glob("*.pkl"):
+        if chemin_cache.name not in caches_utilises:
+            os.remove(chemin_cache)
 
-            except Exception as e:
-                print(
-                    f"Erreur lors du traitement du fichier {fichier.name}: {e}")
-                total_fichiers_echoues += 1
+    # Ordre des fichiers stable pour que drop_duplicates garde toujours la même ligne
+    dataframes = [dataframes[fichier] for fichier in fichiers if fichier in dataframes]
 
     if not dataframes:
         print("Aucun fichier Excel n'a été trouvé.")
@@ -107,35 +187,142 @@ def fusionner_fichiers_excel(dossier_entree, fichier_sortie):
 
     df_final.drop_duplicates(inplace=True)
 
-    df_final.to_excel(fichier_sortie, index=False, engine='openpyxl')
-
-    workbook = load_workbook(fichier_sortie)
-    worksheet = workbook.active
-
-    for col in worksheet.columns:
-        max_length = 0
-        col_letter = col[0].column_letter
-        for cell in col:
-            try:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            except Exception:
-                pass
-        adjusted_width = min(max_length + 2, 50)  # Limiter la largeur maximale
-        worksheet.column_dimensions[col_letter].width = adjusted_width
-
-    workbook.save(fichier_sortie)
+    ecrire_xlsx(df_final, fichier_sortie, largeur_max=50)
 
     print(f"\nRapport de fusion des fichiers Excel :")
     print(f"- Fichiers traités avec succès : {total_fichiers_traites}")
+    print(f"- Fichiers repris du cache : {total_fichiers_en_cache}")
     print(f"- Fichiers en échec : {total_fichiers_echoues}")
     print(f"Fichier final créé : {fichier_sortie.name}")
     print(f"Nombre total de lignes : {len(df_final)}")
 
 
+class MagasinFusion:
+    """
+    Stock SQLite append-only des lignes fusionnées.
+
+    Chaque ligne est indexée par une empreinte de (NOM, DOB, DATE, VALEUR, NOM2) :
+    l'intégration d'un fichier ne coûte que ses propres lignes, les doublons étant
+    écartés par INSERT OR IGNORE. Les fichiers déjà intégrés (même chemin, taille
+    et date de modification) sont mémorisés et ignorés aux passages suivants.
+    """
+
+    def __init__(self, db_path="fusion.db"):
+        self.connexion = sqlite3.connect(db_path)
+        self.connexion.executescript('''
+            CREATE TABLE IF NOT EXISTS lignes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                empreinte INTEGER NOT NULL UNIQUE,
+                NOM TEXT,
+                DOB TEXT,
+                DATE TEXT,
+                VALEUR TEXT,
+                NOM2 TEXT
+            );
+            CREATE TABLE IF NOT EXISTS fichiers (
+                cle TEXT PRIMARY KEY,
+                chemin TEXT,
+                lignes_lues INTEGER,
+                lignes_ajoutees INTEGER,
+                integre_le REAL
+            );
+        ''')
+
+    def fichier_integre(self, cle):
+        return self.connexion.execute(
+            "SELECT 1 FROM fichiers WHERE cle = ?", (cle,)).fetchone() is not None
+
+    def integrer(self, cle, fichier, df):
+        """Ajoute les lignes nouvelles de `df` et retourne leur nombre."""
+        df = df[COLONNES_FUSION].astype(object)
+        empreintes = pd.util.hash_pandas_object(df, index=False).to_numpy().view(np.int64)
+        valeurs = df.where(df.notna(), None)
+        lignes = [(int(empreinte),) + ligne for empreinte, ligne in
+                  zip(empreintes, valeurs.itertuples(index=False, name=None))]
+
+        with self.connexion:
+            avant = self.connexion.total_changes
+            self.connexion.executemany(
+                "INSERT OR IGNORE INTO lignes (empreinte, NOM, DOB, DATE, VALEUR, NOM2) "
+                "VALUES (?, ?, ?, ?, ?, ?)", lignes)
+            ajoutees = self.connexion.total_changes - avant
+            self.connexion.execute(
+                "INSERT OR REPLACE INTO fichiers VALUES (?, ?, ?, ?, ?)",
+                (cle, str(fichier), len(df), ajoutees, time.time()))
+        return ajoutees
+
+    def exporter(self, fichier_sortie):
+        """Écrit toutes les lignes du stock, dans leur ordre d'intégration, et retourne leur nombre."""
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(COLONNES_FUSION)} FROM lignes ORDER BY id", self.connexion)
+        ecrire_xlsx(df, fichier_sortie, largeur_max=50)
+        return len(df)
+
+    def fermer(self):
+        self.connexion.close()
+
+
+def fusionner_incremental(dossier_entree, fichier_sortie=None, db_path="fusion.db",
+                          max_processus=None):
+    """
+    Intègre au stock `db_path` les fichiers Excel nouveaux ou modifiés du dossier.
+
+    Les lignes retirées d'un fichier déjà intégré restent dans le stock.
+
+    :param dossier_entree: Chemin du dossier contenant les fichiers Excel
+    :param fichier_sortie: Si fourni, fichier Excel exporté depuis le stock
+    :param db_path: Base SQLite du stock de fusion
+    :param max_processus: Nombre de processus de lecture (par défaut, un par cœur)
+    """
+    magasin = MagasinFusion(db_path)
+    try:
+        nouveaux = {}
+        for fichier in _lister_fichiers_excel(dossier_entree):
+            cle = _cle_cache(fichier)
+            if not magasin.fichier_integre(cle):
+                nouveaux[fichier] = cle
+
+        total_fichiers_echoues = 0
+        total_lignes_ajoutees = 0
+        for fichier, df, erreur in _lire_en_parallele(nouveaux, max_processus):
+            if erreur is not None:
+                print(
+                    f"Erreur lors du traitement du fichier {fichier.name}: {erreur}")
+                total_fichiers_echoues += 1
+                continue
+
+            ajoutees = magasin.integrer(nouveaux[fichier], fichier, df)
+            total_lignes_ajoutees += ajoutees
+            print(f"Fichier intégré : {fichier.name} ({ajoutees}/{len(df)} lignes nouvelles)")
+
+        print("\nRapport de fusion incrémentale :")
+        print(f"- Fichiers intégrés : {len(nouveaux) - total_fichiers_echoues}")
+        print(f"- Fichiers en échec : {total_fichiers_echoues}")
+        print(f"- Lignes ajoutées : {total_lignes_ajoutees}")
+
+        if fichier_sortie:
+            total_lignes = magasin.exporter(fichier_sortie)
+            print(f"Fichier final créé : {Path(fichier_sortie).name}")
+            print(f"Nombre total de lignes : {total_lignes}")
+    finally:
+        magasin.fermer()
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fusion des fichiers de résultats")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Intègre seulement les fichiers nouveaux au stock fusion.db")
+    parser.add_argument("--exporter", action="store_true",
+                        help="En mode incrémental, écrit le fichier Excel depuis le stock")
+    args = parser.parse_args()
+
     base_dir = Path(__file__).parent
     dossier_source = base_dir / "resultats"
     fichier_de_sortie = base_dir / "fichier_final.xlsx" # remplace par le nom souhaité
 
-    fusionner_fichiers_excel(dossier_source, fichier_de_sortie)
+    if args.incremental:
+        fusionner_incremental(dossier_source,
+                              fichier_de_sortie if args.exporter else None,
+                              db_path=base_dir / "fusion.db")
+    else:
+        fusionner_fichiers_excel(dossier_source, fichier_de_sortie)
@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from correspondance import classer_candidats
+
+
+@dataclass
+class JoueurIndexe:
+    url_details: str
+    nom: str
+    nom_normalise: str
+    statut: str
+    date_naissance: Optional[str] = None
+    score: float = 0
+
+
+class IndexJoueurs:
+    """
+    Index local et persistant des joueurs Transfermarkt déjà vus dans des résultats de recherche.
+
+    Chaque joueur est identifié par l'URL de sa page de détails. Une table inversée
+    jeton -> joueur limite la comparaison floue aux joueurs qui partagent au moins un
+    mot avec le nom recherché.
+    """
+
+    def __init__(self, db_path="index.db"):
+        self._db_path = db_path
+        self._thread_local = threading.local()
+        self._connexions = []
+        self._verrou = threading.Lock()
+        self._create_tables()
+
+    def _get_connection(self):
+        if not hasattr(self._thread_local, 'connection'):
+            connexion = sqlite3.connect(self._db_path, check_same_thread=False, timeout=30)
+            connexion.execute("PRAGMA journal_mode=WAL")
+            self._thread_local.connection = connexion
+            with self._verrou:
+                self._connexions.append(connexion)
+        return self._thread_local.connection
+
+    def _create_tables(self):
+        conn = self._get_connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS joueurs (
+                    url_details TEXT PRIMARY KEY,
+                    nom TEXT,
+                    nom_normalise TEXT,
+                    statut TEXT,
+                    date_naissance TEXT,
+                    vu_le REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jetons (
+                    jeton TEXT,
+                    url_details TEXT REFERENCES joueurs(url_details),
+                    PRIMARY KEY (jeton, url_details)
+                ) WITHOUT ROWID
+            """)
+
+    def ajouter(self, lignes_extraites: Iterable[dict]):
+        """Indexe les lignes extraites d'une page de résultats de recherche."""
+        maintenant = time.time()
+        joueurs = []
+        jetons = []
+        for ligne in lignes_extraites:
+            url_details = ligne['url_details']
+            joueurs.append((url_details, ligne['resultat']['nom'], ligne['nom_normalise'],
+                            ligne['resultat']['statut'], maintenant))
+            jetons.extend((jeton, url_details) for jeton in set(ligne['nom_normalise'].split()))
+        if not joueurs:
+            return
+
+        conn = self._get_connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO joueurs (url_details, nom, nom_normalise, statut, vu_le) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(url_details) DO UPDATE SET "
+                "nom = excluded.nom, nom_normalise = excluded.nom_normalise, "
+                "statut = excluded.statut, vu_le = excluded.vu_le", joueurs)
+            conn.executemany(
+                "INSERT OR IGNORE INTO jetons (jeton, url_details) VALUES (?, ?)", jetons)
+
+    def completer(self, url_details: str, date_naissance: Optional[str]):
+        """Ajoute la date de naissance lue sur la page de détails d'un joueur indexé."""
+        if not date_naissance:
+            return
+        conn = self._get_connection()
+        with conn:
+            conn.execute("UPDATE joueurs SET date_naissance = ? WHERE url_details = ?",
+                         (date_naissance, url_details))
+
+    def rechercher(self, nom_normalise: str, seuil: float) -> List[JoueurIndexe]:
+        """Joueurs partageant un mot avec `nom_normalise` et dont le score atteint `seuil`, du meilleur au moins bon."""
+        jetons = sorted(set(nom_normalise.split()))
+        if not jetons:
+            return []
+
+        conn = self._get_connection()
+        rows = conn.execute(
+            "SELECT url_details, nom, nom_normalise, statut, date_naissance FROM joueurs "
+            "WHERE url_details IN (SELECT url_details FROM jetons WHERE jeton IN "
+            f"({', '.join('?' * len(jetons))}))", jetons).fetchall()
+
+        joueurs = [JoueurIndexe(*row) for row in rows]
+        classement = classer_candidats(
+            nom_normalise, [joueur.nom_normalise for joueur in joueurs], seuil)
+        resultats = []
+        for i, score in classement:
+            joueurs[i].score = score
+            resultats.append(joueurs[i])
+        return resultats
+
+    def resoudre(self, nom_normalise: str, seuil: float) -> Optional[JoueurIndexe]:
+        """
+        Retourne le joueur correspondant à `nom_normalise` lorsqu'il n'y a pas d'ambiguïté :
+        seule correspondance exacte (mêmes mots) parmi les candidats.
+
+        Un candidat proche mais non exact n'est jamais retenu : l'index ne contient que
+        les joueurs déjà vus, un homonyme approché jamais indexé serait confondu avec lui.
+        """
+        mots = sorted(nom_normalise.split())
+        exacts = [joueur for joueur in self.rechercher(nom_normalise, seuil)
+                  if sorted(joueur.nom_normalise.split()) == mots]
+        return exacts[0] if len(exacts) == 1 else None
+
+    def fermer(self):
+        with self._verrou:
+            for connexion in self._connexions:
+                connexion.close()
+            self._connexions = []
+        self._thread_local = threading.local()
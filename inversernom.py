@@ -1,7 +1,7 @@
 import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
 import os
+from formatage import ecrire_xlsx
+from noms import formater_noms_transfermarkt
 
 
 class InverseurNoms:
@@ -9,19 +9,6 @@ class InverseurNoms:
         self.fichier_entree = fichier_entree
         self.fichier_sortie = fichier_sortie
 
-    def inverser_nom(self, nom):
-        if not isinstance(nom, str):
-            return nom
-
-        parties_nom = nom.strip().split()
-
-        if len(parties_nom) >= 3:
-            nom = f"{parties_nom[-2].upper()} {parties_nom[-1].upper()} {' '.join(parties_nom[:-2])}"
-        else:
-            nom = f"{parties_nom[-1].upper()} {' '.join(parties_nom[:-1])}"
-
-        return nom
-
     def traiter_fichier(self):
         extension = os.path.splitext(self.fichier_entree)[1].lower()
 
@@ -35,41 +22,20 @@ class InverseurNoms:
                 "La colonne 'Entree' est introuvable dans le fichier Excel")
 
         df_sortie = pd.DataFrame(
-            {'NOM': df['NOM'].apply(self.inverser_nom)})
+            {'NOM': formater_noms_transfermarkt(df['NOM'])})
 
         extension_sortie = os.path.splitext(self.fichier_sortie)[1].lower()
 
         if extension_sortie == '.xls':
             df_sortie.to_excel(self.fichier_sortie, index=False, engine='xlwt')
+        elif extension_sortie in ['.xlsx', '.xlsm', '.xltx', '.xltm']:
+            ecrire_xlsx(df_sortie, self.fichier_sortie)
         else:
             df_sortie.to_excel(self.fichier_sortie, index=False)
 
-        if extension_sortie in ['.xlsx', '.xlsm', '.xltx', '.xltm']:
-            self.ajuster_largeur_colonnes(self.fichier_sortie)
-
         print(
             f"Fichier traité avec succès. Sauvegardé dans {self.fichier_sortie}")
 
-    def ajuster_largeur_colonnes(self, fichier: str):
-        wb = load_workbook(fichier)
-        sheet = wb.active
-
-        for col in sheet.columns:
-            max_length = 0
-            col_letter = get_column_letter(col[0].column)
-
-            for cell in col:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-
-            adjusted_width = max_length + 2
-            sheet.column_dimensions[col_letter].width = adjusted_width
-
-        wb.save(fichier)
-
 
 def main():
     # à remplacer par ton fichier d'entrée
@@ -1,7 +1,7 @@
 import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
 import os
+from formatage import ecrire_xlsx
+from noms import formater_noms_transfermarkt
 
 
 class InverseurNoms:
@@ -9,16 +9,6 @@ class InverseurNoms:
        self.fichier_entree = fichier_entree
        self.fichier_sortie = fichier_sortie
 
-   def inverser_nom(self, nom):
-       if not isinstance(nom, str):
-           return nom
-       parties_nom = nom.strip().split()
-       if len(parties_nom) >= 3:
-           nom = f"{parties_nom[-2].upper()} {parties_nom[-1].upper()} {' '.join(parties_nom[:-2])}"
-       else:
-           nom = f"{parties_nom[-1].upper()} {' '.join(parties_nom[:-1])}"
-       return nom
-
    def traiter_fichier(self):
       try:
          df = pd.read_excel(self.fichier_entree, engine='openpyxl')
@@ -33,7 +23,7 @@ class InverseurNoms:
 
       df_sortie = df.copy()
       nom_index = df_sortie.columns.get_loc('NOM')
-      noms_inverses = df_sortie['NOM'].apply(self.inverser_nom)
+      noms_inverses = formater_noms_transfermarkt(df_sortie['NOM'])
 
       colonnes = list(df_sortie.columns)
       colonnes.insert(nom_index + 1, 'NOM_INVERSE')
@@ -41,8 +31,11 @@ class InverseurNoms:
       df_sortie['NOM_INVERSE'] = noms_inverses
 
       try:
-          df_sortie.to_excel(self.fichier_sortie,
-                             index=False, engine='openpyxl')
+          if self.fichier_sortie.endswith('.xlsx'):
+              ecrire_xlsx(df_sortie, self.fichier_sortie)
+          else:
+              df_sortie.to_excel(self.fichier_sortie,
+                                 index=False, engine='openpyxl')
       except:
           try:
               df_sortie.to_excel(self.fichier_sortie,
@@ -50,30 +43,9 @@ class InverseurNoms:
           except:
               raise ValueError("Impossible de sauvegarder le fichier Excel")
 
-      if self.fichier_sortie.endswith('.xlsx'):
-          self.ajuster_largeur_colonnes(self.fichier_sortie)
-
       print(
           f"Fichier traité avec succès. Sauvegardé dans {self.fichier_sortie}")
 
-   def ajuster_largeur_colonnes(self, fichier: str):
-       wb = load_workbook(fichier)
-       sheet = wb.active
-
-       for col in sheet.columns:
-           max_length = 0
-           col_letter = get_column_letter(col[0].column)
-           for cell in col:
-               try:
-                   if cell.value:
-                       max_length = max(max_length, len(str(cell.value)))
-               except:
-                   pass
-           adjusted_width = max_length + 2
-           sheet.column_dimensions[col_letter].width = adjusted_width
-
-       wb.save(fichier)
-
 
 def main():
    fichier_entree = 'pour_bugs_inversion_nom.xls'
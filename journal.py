@@ -0,0 +1,56 @@
+import json
+import os
+import threading
+from dataclasses import asdict
+from typing import Dict
+
+from loguru import logger
+
+from players import ValeurJoueur
+
+
+class JournalExecution:
+    """
+    Journal JSON Lines des ValeurJoueur terminés pendant un run.
+
+    Chaque résultat est écrit et vidé sur disque dès son arrivée, pour qu'un run
+    interrompu puisse être repris sans rescraper les joueurs déjà traités.
+    """
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        self._verrou = threading.Lock()
+        self._fichier = None
+
+    def ouvrir(self, reprendre: bool = False):
+        self._fichier = open(self.chemin, "a" if reprendre else "w", encoding="utf-8")
+
+    def enregistrer(self, valeur: ValeurJoueur):
+        ligne = json.dumps(asdict(valeur), ensure_ascii=False)
+        with self._verrou:
+            self._fichier.write(ligne + "\n")
+            self._fichier.flush()
+            os.fsync(self._fichier.fileno())
+
+    def charger(self) -> Dict[str, ValeurJoueur]:
+        """Retourne les résultats sans erreur déjà journalisés, indexés par nom d'origine."""
+        valeurs = {}
+        if not os.path.exists(self.chemin):
+            return valeurs
+
+        with open(self.chemin, encoding="utf-8") as fichier:
+            for numero, ligne in enumerate(fichier, 1):
+                try:
+                    valeur = ValeurJoueur(**json.loads(ligne))
+                except (json.JSONDecodeError, TypeError) as e:
+                    # Dernière ligne tronquée par un arrêt brutal
+                    logger.warning(f"Ligne {numero} du journal ignorée : {e}")
+                    continue
+                if valeur.erreur is None:
+                    valeurs[valeur.nom_original] = valeur
+        return valeurs
+
+    def fermer(self):
+        if self._fichier:
+            self._fichier.close()
+            self._fichier = None
@@ -0,0 +1,42 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from loguru import logger
+
+
+class ChronometreEtapes:
+    """Cumule, pour chaque étape nommée, le temps passé et le nombre de passages."""
+
+    def __init__(self):
+        self._durees = defaultdict(float)
+        self._passages = defaultdict(int)
+        self._verrou = threading.Lock()
+
+    @contextmanager
+    def mesurer(self, etape: str):
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ajouter(etape, time.perf_counter() - debut)
+
+    def ajouter(self, etape: str, duree: float):
+        with self._verrou:
+            self._durees[etape] += duree
+            self._passages[etape] += 1
+
+    def reinitialiser(self):
+        with self._verrou:
+            self._durees.clear()
+            self._passages.clear()
+
+    def afficher(self):
+        with self._verrou:
+            etapes = sorted(self._durees.items(), key=lambda item: item[1], reverse=True)
+            passages = dict(self._passages)
+        for etape, duree in etapes:
+            logger.info(
+                f"Étape {etape} : {duree:.2f}s au total, {passages[etape]} passages, "
+                f"{duree / passages[etape] * 1000:.0f} ms en moyenne")
@@ -0,0 +1,541 @@
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+from typing import Any, Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from cache_pages import CachePages
+from concurrence import LimiteurDebit
+from mesures import ChronometreEtapes
+
+
+# Titres des pages intermédiaires anti-bot (Cloudflare, Incapsula, Akamai...)
+TITRES_CHALLENGE = (
+    "just a moment",
+    "attention required",
+    "access denied",
+    "request unsuccessful",
+    "captcha",
+)
+# Éléments propres aux pages intermédiaires, absents des pages normales même
+# lorsqu'elles chargent un script de protection
+MARQUEURS_CHALLENGE = (
+    'id="challenge-form"',
+    'id="cf-challenge-running"',
+    "cf-chl-widget",
+    "_incapsula_resource",
+    "incapsula incident id",
+    'id="px-captcha"',
+)
+STATUTS_CHALLENGE = {403, 429, 503}
+# Chaque Chrome consomme plusieurs centaines de Mo : le pool reste petit même
+# quand beaucoup de requêtes HTTP sont en vol
+MAX_DRIVERS_SELENIUM = 3
+
+
+class ChallengeDetecte(Exception):
+    """Levée lorsque le site renvoie une page anti-bot au lieu du contenu."""
+
+
+class PageAbsenteDuCache(Exception):
+    """Levée en mode hors ligne lorsqu'une URL n'a jamais été récupérée."""
+
+
+@dataclass
+class Page:
+    html: Optional[str]
+    etag: Optional[str] = None
+    non_modifiee: bool = False
+    # Servie par CachePages sans requête réseau
+    depuis_cache: bool = False
+
+
+_TITRE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+def est_challenge(statut: int, html: str) -> bool:
+    """
+    Indique si une réponse est une page de protection anti-bot : statut de blocage,
+    titre de page intermédiaire ou élément de challenge connu. Une simple mention
+    d'un captcha dans un script ou un pied de page ne suffit pas.
+    """
+    if statut in STATUTS_CHALLENGE:
+        return True
+    debut = html[:5000].lower()
+    titre = _TITRE.search(debut)
+    if titre and any(marqueur in titre.group(1) for marqueur in TITRES_CHALLENGE):
+        return True
+    return any(marqueur in debut for marqueur in MARQUEURS_CHALLENGE)
+
+
+class MoteurFetch(ABC):
+    """Interface commune des moteurs de récupération de pages."""
+
+    @abstractmethod
+    def obtenir_html(self, url: str) -> str:
+        """Retourne le HTML de la page demandée."""
+
+    def obtenir_page(self, url: str, etag: Optional[str] = None) -> Page:
+        """Variante conditionnelle de obtenir_html, pour les moteurs qui la supportent."""
+        return Page(self.obtenir_html(url))
+
+    def fermer(self):
+        pass
+
+
+class MoteurHTTP(MoteurFetch):
+    """Récupère les pages via une session HTTP keep-alive partagée."""
+
+    ENTETES = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+        ),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
+    }
+
+    def __init__(self, base_url: str, max_connexions: int = 10, timeout: float = 30,
+                 chronometre: Optional[ChronometreEtapes] = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.chronometre = chronometre or ChronometreEtapes()
+        self.session = requests.Session()
+        self.session.headers.update(self.ENTETES)
+        adaptateur = HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_connexions, max_retries=1)
+        self.session.mount("http://", adaptateur)
+        self.session.mount("https://", adaptateur)
+        self._session_initialisee = False
+        self._verrou = threading.Lock()
+
+    def _initialiser_session(self):
+        """Visite la page d'accueil une fois pour récupérer les cookies du site.
+
+        Le bandeau de consentement est injecté en JavaScript : en HTTP il n'y a
+        rien à cliquer, la session conserve simplement les cookies reçus.
+        """
+        with self._verrou:
+            if self._session_initialisee:
+                return
+            try:
+                self.session.get(self.base_url, timeout=self.timeout)
+            except requests.RequestException as e:
+                logger.debug(f"Initialisation de la session HTTP impossible: {e}")
+            self._session_initialisee = True
+
+    def obtenir_page(self, url: str, etag: Optional[str] = None) -> Page:
+        if not self._session_initialisee:
+            self._initialiser_session()
+
+        entetes = {"If-None-Match": etag} if etag else None
+        with self.chronometre.mesurer("http.requete"):
+            reponse = self.session.get(url, headers=entetes, timeout=self.timeout)
+        if reponse.status_code == 304:
+            return Page(None, etag, non_modifiee=True)
+        if est_challenge(reponse.status_code, reponse.text):
+            raise ChallengeDetecte(
+                f"Challenge anti-bot ({reponse.status_code}) sur {url}")
+        reponse.raise_for_status()
+        return Page(reponse.text, reponse.headers.get("ETag"))
+
+    def obtenir_html(self, url: str) -> str:
+        return self.obtenir_page(url).html
+
+    def fermer(self):
+        self.session.close()
+
+
+class PoolDrivers:
+    """
+    Pool de navigateurs Chrome créés à la demande et recyclés.
+
+    Un driver est vérifié avant chaque emprunt et remplacé s'il ne répond plus.
+    Il est aussi recyclé après `pages_max` pages ou quand sa mémoire JavaScript
+    dépasse `memoire_max_mo`, pour éviter les fuites de Chrome sur les longs runs.
+    `fermer` quitte tous les drivers, y compris ceux en cours d'utilisation.
+    """
+
+    INTERVALLE_CONTROLE_MEMOIRE = 25
+
+    def __init__(self, fabrique: Callable[[], Any], taille_max: int, pages_max: int = 200,
+                 memoire_max_mo: float = 1024, a_la_destruction: Optional[Callable[[Any], None]] = None):
+        self._fabrique = fabrique
+        self.taille_max = taille_max
+        self.pages_max = pages_max
+        self.memoire_max_mo = memoire_max_mo
+        self._a_la_destruction = a_la_destruction
+        self._disponibles = LifoQueue()
+        self._places = threading.BoundedSemaphore(taille_max)
+        self._pages = {}
+        self._verrou = threading.Lock()
+        self._ferme = False
+
+    def _creer(self):
+        driver = self._fabrique()
+        with self._verrou:
+            self._pages[driver] = 0
+        return driver
+
+    def _detruire(self, driver):
+        with self._verrou:
+            self._pages.pop(driver, None)
+        if self._a_la_destruction:
+            self._a_la_destruction(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Erreur lors de la fermeture d'un driver: {e}")
+
+    def _est_sain(self, driver) -> bool:
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _memoire_mo(self, driver) -> float:
+        try:
+            octets = driver.execute_script(
+                "return performance.memory ? performance.memory.usedJSHeapSize : 0")
+            return (octets or 0) / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    def _doit_recycler(self, driver) -> bool:
+        pages = self._pages.get(driver, 0)
+        if pages >= self.pages_max:
+            return True
+        if pages % self.INTERVALLE_CONTROLE_MEMOIRE == 0:
+            return self._memoire_mo(driver) > self.memoire_max_mo
+        return False
+
+    def emprunter(self):
+        self._places.acquire()
+        try:
+            while True:
+                try:
+                    driver = self._disponibles.get_nowait()
+                except Empty:
+                    return self._creer()
+                if self._est_sain(driver):
+                    return driver
+                logger.warning("Driver inactif détecté, remplacement")
+                self._detruire(driver)
+        except BaseException:
+            self._places.release()
+            raise
+
+    def rendre(self, driver, en_erreur: bool = False):
+        try:
+            if self._ferme:
+                return
+            with self._verrou:
+                if driver in self._pages:
+                    self._pages[driver] += 1
+            if (en_erreur and not self._est_sain(driver)) or self._doit_recycler(driver):
+                self._detruire(driver)
+            else:
+                self._disponibles.put(driver)
+        finally:
+            self._places.release()
+
+    @contextmanager
+    def driver(self):
+        driver = self.emprunter()
+        en_erreur = False
+        try:
+            yield driver
+        except BaseException:
+            en_erreur = True
+            raise
+        finally:
+            self.rendre(driver, en_erreur)
+
+    def fermer(self):
+        self._ferme = True
+        with self._verrou:
+            drivers = list(self._pages)
+        for driver in drivers:
+            self._detruire(driver)
+        while not self._disponibles.empty():
+            self._disponibles.get_nowait()
+
+
+class MoteurSelenium(MoteurFetch):
+    """Récupère les pages avec un pool de navigateurs Chrome headless.
+
+    Aucune attente implicite n'est configurée : chaque attente est explicite et
+    bornée, et le bandeau de consentement n'est attendu qu'une fois par session
+    de navigateur, les pages suivantes réutilisant le cookie posé. Après le
+    chargement, le moteur attend l'élément lu par les parseurs : le tableau de
+    résultats sur une page de recherche, l'en-tête du joueur sur une page de détails.
+    """
+
+    ID_IFRAME_CONSENTEMENT = "sp_message_iframe_953822"
+    SELECTEUR_BOUTON_CONSENTEMENT = (
+        'button.message-component.message-button.no-children.focusable.accept-all.sp_choice_type_11')
+    CHEMIN_RECHERCHE = "/schnellsuche/"
+    SELECTEUR_RESULTATS = "table.items"
+    SELECTEUR_ENTETE_JOUEUR = "header.data-header"
+    DELAI_CHARGEMENT = 10
+    DELAI_CONSENTEMENT = 5
+    # Une recherche sans résultat n'a pas de tableau : attente courte
+    DELAI_CONTENU = 3
+
+    def __init__(self, max_drivers: int = 3, chronometre: Optional[ChronometreEtapes] = None,
+                 pages_max: int = 200, memoire_max_mo: float = 1024):
+        self.max_drivers = max_drivers
+        self.chronometre = chronometre or ChronometreEtapes()
+        self._sessions_consenties = set()
+        self.pool_drivers = PoolDrivers(
+            self._creer_driver, max_drivers, pages_max, memoire_max_mo,
+            a_la_destruction=lambda driver: self._sessions_consenties.discard(driver.session_id))
+
+    def _creer_driver(self):
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-popup-blocking")
+        options.add_argument("--log-level=3")
+
+        prefs = {"profile.managed_default_content_settings.images": 2}
+        options.add_experimental_option("prefs", prefs)
+
+        with self.chronometre.mesurer("selenium.demarrage"):
+            driver = webdriver.Chrome(options=options)
+        driver.set_window_size(1920, 1080)
+        driver.implicitly_wait(0)
+        driver.set_page_load_timeout(30)
+        return driver
+
+    def _attendre_document_pret(self, driver):
+        WebDriverWait(driver, self.DELAI_CHARGEMENT).until(
+            lambda d: d.execute_script("return document.readyState") == "complete")
+
+    def _attendre_contenu(self, driver, selecteur: str) -> bool:
+        try:
+            WebDriverWait(driver, self.DELAI_CONTENU).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, selecteur)))
+            return True
+        except TimeoutException:
+            return False
+
+    def _traiter_popup(self, driver) -> bool:
+        """
+        Accepte le bandeau de consentement, en ne l'attendant qu'une fois par session.
+        Retourne True si un bandeau était affiché.
+        """
+        premiere_page = driver.session_id not in self._sessions_consenties
+        iframes = []
+        try:
+            if premiere_page:
+                iframes = WebDriverWait(driver, self.DELAI_CONSENTEMENT).until(
+                    EC.presence_of_all_elements_located((By.ID, self.ID_IFRAME_CONSENTEMENT)))
+            else:
+                iframes = driver.find_elements(By.ID, self.ID_IFRAME_CONSENTEMENT)
+
+            if iframes:
+                driver.switch_to.frame(iframes[0])
+                boutons = driver.find_elements(By.CSS_SELECTOR, self.SELECTEUR_BOUTON_CONSENTEMENT)
+                if boutons:
+                    boutons[0].click()
+                driver.switch_to.default_content()
+        except TimeoutException:
+            pass
+        except Exception as e:
+            logger.debug(f"Erreur lors du traitement du bandeau de consentement: {e}")
+            driver.switch_to.default_content()
+        finally:
+            self._sessions_consenties.add(driver.session_id)
+        return bool(iframes)
+
+    def obtenir_html(self, url: str) -> str:
+        with self.pool_drivers.driver() as driver:
+            with self.chronometre.mesurer("selenium.chargement"):
+                driver.get(url)
+            with self.chronometre.mesurer("selenium.attente_document"):
+                self._attendre_document_pret(driver)
+            with self.chronometre.mesurer("selenium.consentement"):
+                self._traiter_popup(driver)
+
+            selecteur = (self.SELECTEUR_RESULTATS if self.CHEMIN_RECHERCHE in url
+                         else self.SELECTEUR_ENTETE_JOUEUR)
+            with self.chronometre.mesurer("selenium.attente_contenu"):
+                # Sans contenu, on ne réattend que si un bandeau réapparu le masquait :
+                # une recherche sans résultat ne coûte ainsi qu'une attente
+                if not self._attendre_contenu(driver, selecteur) and self._traiter_popup(driver):
+                    self._attendre_contenu(driver, selecteur)
+            return driver.page_source
+
+    def fermer(self):
+        self.pool_drivers.fermer()
+
+
+class MoteurLimite(MoteurFetch):
+    """
+    Fait passer chaque requête d'un moteur réseau par le LimiteurDebit partagé.
+
+    Les exceptions et les pages anti-bot sont signalées au limiteur, qui ralentit
+    alors tous les workers ; les succès lui permettent de réaccélérer.
+    """
+
+    def __init__(self, moteur: MoteurFetch, limiteur: LimiteurDebit):
+        self.moteur = moteur
+        self.limiteur = limiteur
+
+    def obtenir_page(self, url: str, etag: Optional[str] = None) -> Page:
+        self.limiteur.acquerir()
+        try:
+            page = self.moteur.obtenir_page(url, etag)
+        except ChallengeDetecte:
+            self.limiteur.signaler_echec("challenge")
+            raise
+        except Exception as e:
+            self.limiteur.signaler_echec(type(e).__name__)
+            raise
+
+        if page.html and est_challenge(200, page.html):
+            self.limiteur.signaler_echec("challenge")
+            raise ChallengeDetecte(f"Challenge anti-bot sur {url}")
+        self.limiteur.signaler_succes()
+        return page
+
+    def obtenir_html(self, url: str) -> str:
+        return self.obtenir_page(url).html
+
+    def fermer(self):
+        self.moteur.fermer()
+
+
+class MoteurHybride(MoteurFetch):
+    """
+    Passe par HTTP et ne bascule sur Chrome qu'en cas de challenge anti-bot.
+
+    Après un challenge, toutes les requêtes passent par Chrome pendant
+    `duree_bascule` secondes : réessayer HTTP à chaque page signalerait un échec
+    au limiteur et bloquerait le débit au minimum alors que Chrome fonctionne.
+    """
+
+    def __init__(self, moteur_http: MoteurFetch, fabrique_selenium: Callable[[], MoteurFetch],
+                 duree_bascule: float = 300):
+        self.moteur_http = moteur_http
+        self._fabrique_selenium = fabrique_selenium
+        self._moteur_selenium: Optional[MoteurFetch] = None
+        self._verrou = threading.Lock()
+        self.duree_bascule = duree_bascule
+        self._selenium_jusqua = 0.0
+
+    def _obtenir_moteur_selenium(self) -> MoteurFetch:
+        with self._verrou:
+            if self._moteur_selenium is None:
+                logger.info("Démarrage du moteur Selenium de secours")
+                self._moteur_selenium = self._fabrique_selenium()
+            return self._moteur_selenium
+
+    def obtenir_page(self, url: str, etag: Optional[str] = None) -> Page:
+        if time.monotonic() < self._selenium_jusqua:
+            return Page(self._obtenir_moteur_selenium().obtenir_html(url))
+        try:
+            return self.moteur_http.obtenir_page(url, etag)
+        except ChallengeDetecte as e:
+            logger.warning(f"{e} - bascule sur Selenium pour {self.duree_bascule:.0f} s")
+            self._selenium_jusqua = time.monotonic() + self.duree_bascule
+            return Page(self._obtenir_moteur_selenium().obtenir_html(url))
+
+    def obtenir_html(self, url: str) -> str:
+        return self.obtenir_page(url).html
+
+    def fermer(self):
+        self.moteur_http.fermer()
+        if self._moteur_selenium is not None:
+            self._moteur_selenium.fermer()
+
+
+class MoteurAvecCache(MoteurFetch):
+    """
+    Sert les pages depuis CachePages tant qu'elles sont fraîches.
+
+    Une page périmée est revalidée avec son ETag quand le moteur le permet. En mode
+    hors ligne, seul le cache est consulté, quel que soit l'âge des pages : cela
+    permet de rejouer l'analyse HTML sans aucune requête.
+
+    `a_mettre_en_cache(url, html)` peut écarter des pages du cache, par exemple
+    des pages vides dues à un blocage silencieux, pour qu'elles soient
+    retéléchargées à la prochaine demande.
+    """
+
+    def __init__(self, moteur: MoteurFetch, cache_pages: CachePages,
+                 duree_validite: float = 24 * 3600, hors_ligne: bool = False,
+                 a_mettre_en_cache: Optional[Callable[[str, str], bool]] = None):
+        self.moteur = moteur
+        self.cache_pages = cache_pages
+        self.duree_validite = duree_validite
+        self.hors_ligne = hors_ligne
+        self.a_mettre_en_cache = a_mettre_en_cache
+
+    def obtenir_page(self, url: str, etag: Optional[str] = None) -> Page:
+        en_cache = self.cache_pages.obtenir(url)
+
+        if self.hors_ligne:
+            if en_cache is None:
+                raise PageAbsenteDuCache(f"Page absente du cache : {url}")
+            return Page(en_cache.html, en_cache.etag, depuis_cache=True)
+
+        if en_cache and time.time() - en_cache.recupere_le <= self.duree_validite:
+            return Page(en_cache.html, en_cache.etag, depuis_cache=True)
+
+        page = self.moteur.obtenir_page(url, en_cache.etag if en_cache else None)
+        if page.non_modifiee and en_cache:
+            self.cache_pages.rafraichir(url)
+            return Page(en_cache.html, en_cache.etag)
+
+        if self.a_mettre_en_cache is None or self.a_mettre_en_cache(url, page.html):
+            self.cache_pages.definir(url, page.html, page.etag)
+        return page
+
+    def obtenir_html(self, url: str) -> str:
+        return self.obtenir_page(url).html
+
+    def fermer(self):
+        self.moteur.fermer()
+        self.cache_pages.fermer()
+
+
+def creer_moteur(nom: str, base_url: str, max_threads: int = 3,
+                 chronometre: Optional[ChronometreEtapes] = None,
+                 limiteur: Optional[LimiteurDebit] = None) -> MoteurFetch:
+    """
+    Instancie le moteur de récupération demandé ("http", "selenium" ou "hybride").
+
+    Avec un `limiteur`, chaque moteur réseau (HTTP comme Selenium) passe par lui.
+    Le pool HTTP compte `max_threads * 2` connexions, le pool Chrome au plus
+    MAX_DRIVERS_SELENIUM navigateurs.
+    """
+    def limiter(moteur: MoteurFetch) -> MoteurFetch:
+        return MoteurLimite(moteur, limiteur) if limiteur else moteur
+
+    if nom == "http":
+        return limiter(MoteurHTTP(base_url, max_connexions=max_threads * 2, chronometre=chronometre))
+    max_drivers = min(max_threads, MAX_DRIVERS_SELENIUM)
+    if nom == "selenium":
+        return limiter(MoteurSelenium(max_drivers=max_drivers, chronometre=chronometre))
+    if nom == "hybride":
+        return MoteurHybride(
+            limiter(MoteurHTTP(base_url, max_connexions=max_threads * 2, chronometre=chronometre)),
+            lambda: limiter(MoteurSelenium(max_drivers=max_drivers, chronometre=chronometre))
+        )
+    raise ValueError(f"Moteur de récupération inconnu : {nom}")
@@ -0,0 +1,67 @@
+"""
+Transformations de noms partagées par run.py et les scripts d'inversion.
+
+Les fonctions `*_noms` s'appliquent à une Series entière. Chaque nom distinct n'est
+transformé qu'une fois, puis chaque ligne récupère son résultat dans un dictionnaire
+(compréhension de liste sur `correspondances.get`) : les fichiers fusionnés répètent
+beaucoup les mêmes joueurs, et sur des colonnes de type object les méthodes `.str`
+de pandas bouclent elles aussi en Python, avec plus de surcoût.
+"""
+from typing import Callable
+
+import pandas as pd
+
+
+def inverser_nom(nom: str) -> str:
+    """Inverse l'ordre des mots : 'Kylian Mbappé' -> 'Mbappé Kylian'."""
+    if not nom:
+        return ""
+    mots = nom.split()
+    return " ".join(mots[::-1])
+
+
+def formater_nom_transfermarkt(nom: str) -> str:
+    """
+    Met le nom de famille en tête et en majuscules.
+
+    À partir de trois mots, les deux derniers forment le nom de famille :
+    'Lucas Tolentino Paqueta' -> 'TOLENTINO PAQUETA Lucas', 'Kylian Mbappé' -> 'MBAPPÉ Kylian'.
+    """
+    parties_nom = nom.split()
+    if not parties_nom:
+        return nom
+
+    if len(parties_nom) >= 3:
+        return f"{parties_nom[-2].upper()} {parties_nom[-1].upper()} {' '.join(parties_nom[:-2])}"
+    return f"{parties_nom[-1].upper()} {' '.join(parties_nom[:-1])}"
+
+
+def formater_nom2(nom_original: str) -> str:
+    """Place en tête le premier mot entièrement en majuscules : 'Kylian MBAPPE' -> 'MBAPPE Kylian'."""
+    parties = nom_original.split()
+    for index_majuscule, mot in enumerate(parties):
+        if mot.isupper():
+            autres_parties = parties[:index_majuscule] + parties[index_majuscule+1:]
+            return f"{mot} {' '.join(autres_parties)}"
+
+    return nom_original
+
+
+def _appliquer_par_valeur_unique(noms: pd.Series, fonction: Callable[[str], str]) -> pd.Series:
+    """Applique `fonction` une fois par chaîne distincte ; les autres valeurs sont conservées."""
+    correspondances = {nom: fonction(nom) for nom in pd.unique(noms) if isinstance(nom, str)}
+    return pd.Series(
+        [correspondances.get(nom, nom) if isinstance(nom, str) else nom for nom in noms.tolist()],
+        index=noms.index, dtype=object)
+
+
+def inverser_noms(noms: pd.Series) -> pd.Series:
+    return _appliquer_par_valeur_unique(noms, inverser_nom)
+
+
+def formater_noms_transfermarkt(noms: pd.Series) -> pd.Series:
+    return _appliquer_par_valeur_unique(noms, formater_nom_transfermarkt)
+
+
+def formater_noms2(noms: pd.Series) -> pd.Series:
+    return _appliquer_par_valeur_unique(noms, formater_nom2)
@@ -0,0 +1,56 @@
+"""
+Normalisation des noms de joueurs pour les recherches et la comparaison des résultats.
+
+Les mêmes noms Transfermarkt reviennent sur de nombreuses pages de recherche :
+`normaliser_nom` est mémoïsé (LRU borné, partagé entre les threads) et la plupart
+des noms évitent la décomposition NFD grâce à une table de traduction précalculée.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+
+TAILLE_MEMO = 65536
+
+_CARACTERES_HORS_NOM = re.compile(r"[^a-zA-Z0-9\s\-]")
+
+
+def _sans_diacritiques(texte: str) -> str:
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', texte) if unicodedata.category(c) != 'Mn'
+    )
+
+
+def _construire_table_latin() -> dict:
+    """Table caractère -> caractère sans diacritiques pour les blocs Latin-1 et Latin étendu."""
+    table = {ord('æ'): 'ae', ord('Æ'): 'AE'}
+    for code in range(0x00C0, 0x0250):
+        caractere = chr(code)
+        if code in table:
+            continue
+        sans_diacritiques = _sans_diacritiques(caractere)
+        if sans_diacritiques != caractere:
+            table[code] = sans_diacritiques
+    return table
+
+
+_TABLE_LATIN = _construire_table_latin()
+
+
+@lru_cache(maxsize=TAILLE_MEMO)
+def normaliser_nom(nom: str) -> str:
+    """
+    Minuscules, sans accents ni ponctuation, tirets remplacés par des espaces :
+    'Kylian Mbappé-Lottin' -> 'kylian mbappe lottin'.
+    """
+    nom = nom.translate(_TABLE_LATIN)
+    if not nom.isascii():
+        # Caractères hors table (autres alphabets, diacritiques combinants isolés)
+        nom = _sans_diacritiques(nom)
+
+    return _CARACTERES_HORS_NOM.sub("", nom).lower().strip().replace("-", " ")
+
+
+def cle_nom(nom) -> str:
+    """Clé d'identité d'un nom, insensible à la casse, aux accents et aux tirets."""
+    return " ".join(normaliser_nom(str(nom)).split())
@@ -1,25 +1,28 @@
 import os
-import re
+import asyncio
 import time
 import sqlite3
 import threading
-import unicodedata
 import logging
-from itertools import permutations, combinations
-from rapidfuzz import fuzz
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from collections import Counter
+from statistics import median
 from urllib.parse import urljoin
 from urllib.parse import quote
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from selectolax.parser import HTMLParser
-from selenium import webdriver
-from selenium.webdriver.common.by import By
 from loguru import logger
-from queue import Queue
-from typing import Any, List, Dict, Optional
-from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional, Tuple
+from functools import partial
+from dataclasses import dataclass, field, replace
+from cache_pages import CachePages
+from moteurs import MoteurAvecCache, creer_moteur
+from concurrence import LimiteurDebit, VolUnique, delai_reessai
+from correspondance import classer_candidats
+from details import extraire_details, parser_valeur_marche
+from index_joueurs import IndexJoueurs
+from mesures import ChronometreEtapes
+from normalisation import cle_nom, normaliser_nom
+from variantes import MAX_VARIANTES, planifier_variantes
 
 
 logging.getLogger('tensorflow').setLevel(logging.ERROR)
@@ -37,19 +40,97 @@ class ValeurJoueur:
     date_naissance: str = None
     controle: str = ""
     erreur: Optional[str] = None
-    timestamp: float = time.time()
+    timestamp: float = field(default_factory=time.time)
+    url_details: Optional[str] = None
+    depuis_cache: bool = False
+    club: Optional[str] = None
+    position: Optional[str] = None
+    # Champs effectivement mis à jour par ce résultat ; None : tous
+    champs_actualises: Optional[List[str]] = None
+
+
+@dataclass
+class PolitiqueConfiance:
+    """Règles d'arrêt anticipé de la recherche d'un joueur."""
+    arret_exact: bool = True
+    seuil_candidat_unique: float = 95
+    budget_requetes: int = MAX_VARIANTES
+
+
+@dataclass
+class StatistiquesRecherche:
+    requetes: int
+    pages_vides: int
+    candidats: int
+    score: float
+    raison_arret: str
+    echecs: int = 0
+
+
+@dataclass
+class EtatRecherche:
+    """Meilleur candidat trouvé au fil des variantes de recherche d'un joueur."""
+    nom_normalise: str
+    resultat: Optional[dict] = None
+    url_details: Optional[str] = None
+    score: float = 0
+    exact: bool = False
+    requetes: int = 0
+    pages_vides: int = 0
+    raison_arret: str = "variantes epuisees"
+    echecs: int = 0
+    candidats: set = field(default_factory=set)
+    urls_visitees: set = field(default_factory=set)
+
+    def statistiques(self) -> StatistiquesRecherche:
+        return StatistiquesRecherche(
+            self.requetes, self.pages_vides, len(self.candidats), self.score, self.raison_arret,
+            self.echecs)
+
+
+CHAMPS_JOUEUR = ('valeur', 'fin_contrat', 'date_naissance')
 
 
 class CacheSQLite:
-    def __init__(self, db_path="cache.db", duree_cache=3600):
+    """Cache persistant des ValeurJoueur, avec une durée de validité propre à chaque champ."""
+
+    DUREES_CHAMPS = {
+        'valeur': 24 * 3600,
+        'fin_contrat': 7 * 24 * 3600,
+        'date_naissance': 10 * 365 * 24 * 3600,
+    }
+    COLONNES = {
+        'url_details': 'TEXT',
+        'controle': 'TEXT',
+        'ts_valeur': 'REAL',
+        'ts_fin_contrat': 'REAL',
+        'ts_date_naissance': 'REAL',
+    }
+
+    def __init__(self, db_path="cache.db", duree_cache=None, durees_champs: Optional[Dict[str, float]] = None):
         self._db_path = db_path
-        self.duree_cache = duree_cache
+        self.durees_champs = dict(self.DUREES_CHAMPS)
+        if duree_cache is not None:
+            self.durees_champs['valeur'] = duree_cache
+        self.durees_champs.update(durees_champs or {})
         self._thread_local = threading.local()
+        self._connexions = []
+        self._verrou = threading.Lock()
         self._create_table()
 
+    @property
+    def duree_cache(self) -> float:
+        return self.durees_champs['valeur']
+
     def _get_connection(self):
         if not hasattr(self._thread_local, 'connection'):
-            self._thread_local.connection = sqlite3.connect(self._db_path)
+            connexion = sqlite3.connect(self._db_path, check_same_thread=False, timeout=30)
+            # WAL : lectures concurrentes entre threads et processus de shards
+            connexion.execute("PRAGMA journal_mode=WAL")
+            connexion.row_factory = sqlite3.Row
+            self._thread_local.connection = connexion
+            with self._verrou:
+                self._connexions.append(connexion)
         return self._thread_local.connection
 
     def _create_table(self):
@@ -67,191 +148,172 @@ class CacheSQLite:
                     timestamp INTEGER
                 )
             """)
+            existantes = {row['name'] for row in conn.execute("PRAGMA table_info(cache)")}
+            for colonne, type_sql in self.COLONNES.items():
+                if colonne not in existantes:
+                    conn.execute(f"ALTER TABLE cache ADD COLUMN {colonne} {type_sql}")
+
+    def _est_frais(self, row, champ: str, maintenant: float) -> bool:
+        horodatage = row[f"ts_{champ}"]
+        return horodatage is not None and maintenant - horodatage <= self.durees_champs[champ]
 
-    def obtenir(self, nom_joueur: str) -> Optional[ValeurJoueur]:
+    def obtenir(self, nom_joueur: str, champs=CHAMPS_JOUEUR) -> Optional[ValeurJoueur]:
+        """Retourne le joueur en cache si tous les champs demandés sont encore valides."""
         conn = self._get_connection()
         cursor = conn.execute(
             "SELECT * FROM cache WHERE nom_joueur = ?", (nom_joueur,))
         row = cursor.fetchone()
-        if row and time.time() - row[5] <= self.duree_cache:
-            return ValeurJoueur(*row)
-        return None
+        maintenant = time.time()
+        if not row or not all(self._est_frais(row, champ, maintenant) for champ in champs):
+            return None
+
+        return ValeurJoueur(
+            nom_original=nom_joueur,
+            nom_transfermarkt=row['nom_transfermarkt'],
+            valeur=row['valeur'],
+            statut=row['statut'],
+            fin_contrat=row['fin_contrat'],
+            date_naissance=row['date_naissance'],
+            controle=row['controle'] or "",
+            erreur=row['erreur'],
+            timestamp=row['timestamp'],
+            url_details=row['url_details'],
+            depuis_cache=True
+        )
 
     def definir(self, nom_joueur: str, valeur: ValeurJoueur):
+        """
+        Enregistre le joueur. Seuls les champs de `valeur.champs_actualises` (tous par
+        défaut) sont écrits avec leur horodatage ; les autres gardent leur valeur en cache,
+        sauf si l'entrée désignait un autre joueur (autre `url_details`) : ils sont alors
+        effacés pour ne pas mélanger deux joueurs.
+        """
+        champs = CHAMPS_JOUEUR if valeur.champs_actualises is None else valeur.champs_actualises
+        # Dans les CASE, url_details est celui de l'ancienne ligne (SQLite évalue tout
+        # le SET avant d'affecter)
+        mises_a_jour = ", ".join(
+            f"{champ} = excluded.{champ}, ts_{champ} = excluded.ts_{champ}"
+            if champ in champs else
+            f"{champ} = CASE WHEN url_details IS excluded.url_details THEN {champ} END, "
+            f"ts_{champ} = CASE WHEN url_details IS excluded.url_details THEN ts_{champ} END"
+            for champ in CHAMPS_JOUEUR)
         conn = self._get_connection()
         with conn:
             conn.execute(
-                "INSERT OR REPLACE INTO cache (nom_joueur, nom_transfermarkt, valeur, statut, erreur, timestamp) "
-                "VALUES (?, ?, ?, ?, ?, ?)",
+                "INSERT INTO cache (nom_joueur, nom_transfermarkt, valeur, statut, erreur, "
+                "fin_contrat, date_naissance, timestamp, url_details, controle, "
+                "ts_valeur, ts_fin_contrat, ts_date_naissance) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(nom_joueur) DO UPDATE SET nom_transfermarkt = excluded.nom_transfermarkt, "
+                "statut = excluded.statut, erreur = excluded.erreur, timestamp = excluded.timestamp, "
+                f"url_details = excluded.url_details, controle = excluded.controle, {mises_a_jour}",
                 (nom_joueur, valeur.nom_transfermarkt, valeur.valeur,
-                 valeur.statut, valeur.erreur, valeur.timestamp)
+                 valeur.statut, valeur.erreur, valeur.fin_contrat, valeur.date_naissance,
+                 valeur.timestamp, valeur.url_details, valeur.controle,
+                 *(valeur.timestamp if champ in champs else None for champ in CHAMPS_JOUEUR))
             )
 
     def fermer(self):
-        if hasattr(self._thread_local, 'connection'):
-            self._thread_local.connection.close()
-            del self._thread_local.connection
+        with self._verrou:
+            for connexion in self._connexions:
+                connexion.close()
+            self._connexions = []
+        self._thread_local = threading.local()
 
 
 class ScraperTransferMarkt:
     BASE_URL = "https://www.transfermarkt.fr"
-
-    def __init__(self, max_threads: int = 3):
+    CHEMIN_RECHERCHE = "/schnellsuche/ergebnis/schnellsuche"
+    SEUIL_CORRESPONDANCE = 90
+    # Consultations SQLite du pipeline asynchrone, hors de la boucle d'événements
+    THREADS_CONSULTATION = 4
+
+    def __init__(self, max_threads: int = 3, moteur: str = "hybride", base_url: Optional[str] = None,
+                 max_variantes: int = MAX_VARIANTES, politique: Optional[PolitiqueConfiance] = None,
+                 cache_pages: bool = True, hors_ligne: bool = False, index_local: bool = True,
+                 champs_requis=CHAMPS_JOUEUR, debit_requetes: float = 4.0, max_tentatives: int = 2):
+        """
+        `champs_requis` : champs de CHAMPS_JOUEUR dont l'appelant a besoin. La page de
+        détails n'est téléchargée que si la ligne de recherche et le cache ne les
+        fournissent pas tous ; ('valeur',) suffit pour une simple mise à jour des valeurs.
+
+        `debit_requetes` : requêtes réseau par seconde, tous workers confondus, avant
+        ralentissement adaptatif. Les joueurs en échec pour une cause transitoire sont
+        relancés en fin de lot jusqu'à `max_tentatives` fois.
+        """
         self.max_threads = max_threads
+        self.max_tentatives = max_tentatives
+        self.champs_requis = tuple(champs_requis)
+        self.max_variantes = max_variantes
+        self.politique = politique or PolitiqueConfiance(budget_requetes=max_variantes)
+        self.statistiques_recherche: Dict[str, StatistiquesRecherche] = {}
+        self.base_url = base_url or self.BASE_URL
         self.cache = CacheSQLite()
-        self.pool_drivers = Queue()
-        self._initialiser_pool_drivers()
+        self.chronometre_etapes = ChronometreEtapes()
+        self.limiteur = LimiteurDebit(debit_requetes)
+        self.moteur = creer_moteur(
+            moteur, self.base_url, max_threads, self.chronometre_etapes, self.limiteur)
+        if cache_pages or hors_ligne:
+            pages = CachePages()
+            if not hors_ligne:
+                # Le mode hors ligne rejoue les pages quel que soit leur âge
+                self._purger_cache_pages(pages)
+            self.moteur = MoteurAvecCache(
+                self.moteur, pages, self.cache.duree_cache, hors_ligne,
+                a_mettre_en_cache=self._page_a_mettre_en_cache)
+        self.index = IndexJoueurs() if index_local else None
+        self.requetes_en_vol = VolUnique()
         self.joueurs_non_traites = []
+        self.echecs_transitoires = set()
+        self.joueurs_relances = 0
 
-    def _initialiser_pool_drivers(self):
-        for _ in range(self.max_threads):
-            driver = self._creer_driver()
-            self.pool_drivers.put(driver)
-
-    def _creer_driver(self):
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-popup-blocking")
-        options.add_argument("--log-level=3")
-
-        prefs = {"profile.managed_default_content_settings.images": 2}
-        options.add_experimental_option("prefs", prefs)
-
-        driver = webdriver.Chrome(options=options)
-        driver.set_window_size(1920, 1080)
-        driver.implicitly_wait(5)
-        driver.set_page_load_timeout(30)
-        return driver
-
-    def _traiter_popup(self, driver):
+    def _purger_cache_pages(self, pages: CachePages):
         try:
-            iframe = driver.find_elements(By.ID, "sp_message_iframe_953822")
-            if iframe:
-                driver.switch_to.frame(iframe[0])
-                html = HTMLParser(driver.page_source)
-                bouton = html.css_first(
-                    'button.message-component.message-button.no-children.focusable.accept-all.sp_choice_type_11')
-                if bouton:
-                    bouton.click()
-                driver.switch_to.default_content()
-        except Exception as e:
-            driver.switch_to.default_content()
-
-    def _obtenir_table(self, driver) -> Optional[HTMLParser]:
-        for _ in range(2):
-            html = HTMLParser(driver.page_source)
-            table = html.css_first("table.items")
-            if table:
-                return table
-            self._traiter_popup(driver)
-        return None
+            pages_supprimees, contenus_supprimes = pages.purger()
+        except sqlite3.Error as e:
+            logger.warning(f"Purge du cache de pages impossible: {e}")
+            return
+        if pages_supprimees or contenus_supprimes:
+            logger.info(f"Cache de pages purgé : {pages_supprimees} pages, "
+                        f"{contenus_supprimes} contenus orphelins")
+
+    def _obtenir_table(self, url: str) -> Tuple[Optional[HTMLParser], bool]:
+        """Tableau de résultats de la page (ou None) et indicateur de page servie par le cache."""
+        page = self.moteur.obtenir_page(url)
+        with self.chronometre_etapes.mesurer("recherche.analyse"):
+            return HTMLParser(page.html).css_first("table.items"), page.depuis_cache
+
+    def _page_a_mettre_en_cache(self, url: str, html: str) -> bool:
+        """Une page de recherche sans tableau de résultats (blocage silencieux possible) n'est pas gardée."""
+        return self.CHEMIN_RECHERCHE not in url or 'class="items"' in html
 
     def _normaliser_nom(self, nom_joueur: str) -> str:
         try:
-            nom_joueur = nom_joueur.replace('æ', 'ae').replace('Æ', 'AE')
-
-            nom_joueur = ''.join(
-                c for c in unicodedata.normalize('NFD', nom_joueur) if unicodedata.category(c) != 'Mn'
-            )
-
-            nom_joueur_nettoyer = re.sub(
-                r"[^a-zA-Z0-9\s\-]", "", nom_joueur).lower().strip()
-
-            return nom_joueur_nettoyer.replace("-", " ")
+            return normaliser_nom(nom_joueur)
         except Exception as e:
             logger.error(
                 f"Erreur lors de la normalisation du nom de joueur: {e}")
             return nom_joueur
 
     def _generer_variantes_recherche(self, nom_joueur: str) -> list:
-        noms = [nom for nom in nom_joueur.split() if nom]
         variantes = []
-
-        variantes.append(nom_joueur)
-
-        for taille in range(1, len(noms) + 1):
-            combinaisons = list(combinations(noms, taille))
-
-            for combo in combinaisons:
-                perms = list(permutations(combo))
-
-                for perm in perms:
-                    variante = " ".join(perm)
-                    variantes.append(variante)
-
-        variantes_sans_accents = []
-        for variante in variantes:
+        for variante in planifier_variantes(nom_joueur, self.max_variantes):
+            variantes.append(variante)
             variante_normalisee = self._normaliser_nom(variante)
             if variante_normalisee != variante:
-                variantes_sans_accents.append(variante_normalisee)
-
-        variantes.extend(variantes_sans_accents)
+                variantes.append(variante_normalisee)
 
-        return list(dict.fromkeys(variantes))
+        return list(dict.fromkeys(variantes))[:self.max_variantes]
 
     def _parser_valeur_marche(self, valeur_texte: str) -> float:
         try:
-            match = re.search(r"(\d+(?:,\d+)?)\s*(mio\.|K)", valeur_texte)
-            if not match:
-                return 0.0
-            valeur, unite = match.groups()
-            valeur = float(valeur.replace(",", "."))
-            return valeur if unite == "mio." else valeur / 1000
+            return parser_valeur_marche(valeur_texte)
         except Exception:
             return 0.0
 
-    def _parser_valeur_fin_contrat(self, html):
-        try:
-            contrat_spans = html.css('span')
-
-            for i, span in enumerate(contrat_spans):
-                text = span.text(strip=True)
-                if "Contrat jusqu'à:" in text:
-                    if i + 1 < len(contrat_spans):
-                        next_span = contrat_spans[i + 1]
-                        value_end_date = next_span.text(strip=True)
-
-                        if value_end_date == '-' or not value_end_date:
-                            return '?'
-                        return value_end_date
-
-            logger.warning("Aucune date de fin de contrat trouvée")
-            return '?'
-
-        except Exception as e:
-            logger.error(f"Erreur lors du parsing de la fin de contrat: {e}")
-            return None
-
-    def _parser_date_naissance(self, html):
+    def _recuperer_fin_contrat(self, url_details):
         try:
-            items = html.css('div.data-header__details ul.data-header__items li')
-            for item in items:
-                if 'Naissance' in item.text():
-                    span = item.css_first('span[itemprop="birthDate"]')
-                    if span:
-                        date_naissance = span.text(strip=True)
-                        date_naissance = date_naissance.split('(')[0].strip()
-                        return date_naissance
-            logger.warning("Aucune date de naissance trouvée")
-            return None
-        except Exception as e:
-            logger.error(f"Erreur lors du parsing de la date de naissance: {e}")
-            return None
-                
-
-    def _recuperer_fin_contrat(self, driver, url_details):
-        try:
-            driver.get(url_details)
-
-            WebDriverWait(driver, 5)
-            self._traiter_popup(driver)
-
-            html = HTMLParser(driver.page_source)
-
-            return self._parser_valeur_fin_contrat(html)
+            return extraire_details(self.moteur.obtenir_html(url_details)).fin_contrat or '?'
 
         except Exception as e:
             logger.warning(
@@ -273,8 +335,11 @@ class ScraperTransferMarkt:
         )
 
 
-    def _creer_valeur_joueur_erreur(self, nom_joueur: str, erreur: str) -> ValeurJoueur:
-        """Crée un ValeurJoueur pour les cas d'erreur."""
+    def _creer_valeur_joueur_erreur(self, nom_joueur: str, erreur: str,
+                                    transitoire: bool = False) -> ValeurJoueur:
+        """Crée un ValeurJoueur pour les cas d'erreur ; `transitoire` le rend éligible à une relance."""
+        if transitoire:
+            self.echecs_transitoires.add(nom_joueur)
         return ValeurJoueur(
             nom_original=nom_joueur,
             nom_transfermarkt=nom_joueur,
@@ -288,8 +353,21 @@ class ScraperTransferMarkt:
         )
 
 
-    def _analyser_ligne_resultat(self, ligne, nom_normalise: str, cache_resultats_normals: dict):
-        """Analyse une ligne de résultat et retourne les informations extraites."""
+    @staticmethod
+    def _lignes_resultats(table):
+        """
+        Lignes de premier niveau du tableau de résultats. Les lignes des tableaux
+        `inline-table` imbriqués (nom, position) ne sont pas des joueurs distincts.
+        """
+        for enfant in table.iter(include_text=False):
+            if enfant.tag == 'tbody':
+                yield from (ligne for ligne in enfant.iter(include_text=False) if ligne.tag == 'tr')
+            elif enfant.tag == 'tr':
+                yield enfant
+
+
+    def _extraire_ligne_resultat(self, ligne) -> Optional[dict]:
+        """Extrait le nom, l'URL de détails et les informations d'une ligne de résultat."""
         element_nom = ligne.css_first("td.hauptlink a[title]")
         if not element_nom:
             return None
@@ -298,32 +376,29 @@ class ScraperTransferMarkt:
         if not nom_transfermarkt:
             return None
 
-        nom_normalise_transfermarkt = self._normaliser_nom(nom_transfermarkt)
-        url_details = urljoin(
-            self.BASE_URL, element_nom.attributes.get('href', ''))
-
-        # Calcul des scores de similarité
-        score_token = fuzz.token_sort_ratio(
-            nom_normalise, nom_normalise_transfermarkt)
-        score_partial = fuzz.partial_ratio(
-            nom_normalise, nom_normalise_transfermarkt)
-        score_set = fuzz.token_set_ratio(
-            nom_normalise, nom_normalise_transfermarkt)
-        score = max(score_token, score_partial, score_set)
-
-        if nom_normalise_transfermarkt in cache_resultats_normals:
-            resultat = cache_resultats_normals[nom_normalise_transfermarkt]
-        else:
-            resultat = self._extraire_info_joueur(ligne)
-            cache_resultats_normals[nom_normalise_transfermarkt] = resultat
-
         return {
-            'score': score,
-            'url_details': url_details,
-            'resultat': resultat
+            'nom_normalise': self._normaliser_nom(nom_transfermarkt),
+            'url_details': urljoin(
+                self.base_url, element_nom.attributes.get('href', '')),
+            'resultat': self._extraire_info_joueur(ligne)
         }
 
 
+    def _analyser_lignes_resultat(self, lignes_extraites: List[dict], nom_normalise: str) -> List[dict]:
+        """
+        Score toutes les lignes d'une page en un seul appel et retourne celles qui
+        atteignent le seuil, classées par score puis par valeur décroissants.
+        """
+        classement = classer_candidats(
+            nom_normalise,
+            [ligne_extraite['nom_normalise'] for ligne_extraite in lignes_extraites],
+            self.SEUIL_CORRESPONDANCE)
+        candidats = [{'score': score, **lignes_extraites[i]} for i, score in classement]
+        candidats.sort(key=lambda candidat: (candidat['score'], candidat['resultat']['valeur']),
+                       reverse=True)
+        return candidats
+
+
     def _extraire_info_joueur(self, ligne) -> dict:
         """Extrait les informations d'un joueur à partir d'une ligne."""
         statut_element = ligne.css_first("td")
@@ -340,189 +415,699 @@ class ScraperTransferMarkt:
                 if valeur_texte:
                     valeur = self._parser_valeur_marche(valeur_texte)
 
+        club_element = ligne.css_first("td.zentriert a[title]")
+        position_element = ligne.css_first("table.inline-table tr:last-child td")
+
         return {
             'nom': ligne.css_first("td.hauptlink a[title]").attributes.get('title', ''),
             'valeur': valeur,
-            'statut': statut
+            'statut': statut,
+            'club': club_element.attributes.get('title') if club_element else None,
+            'position': position_element.text(strip=True) if position_element else None
         }
 
 
-    def _rechercher_meilleur_resultat(self, driver, variantes_recherche: list, nom_normalise: str):
-        """Recherche le meilleur résultat parmi toutes les variantes."""
-        meilleur_resultat = None
-        meilleur_url_details = None
-        meilleur_score = 0
-        urls_visitees = set()
-        cache_resultats_normals = {}
+    def _url_recherche(self, variante: str) -> str:
+        return f"{self.base_url}{self.CHEMIN_RECHERCHE}?query={quote(variante)}"
 
-        for variante in variantes_recherche:
-            url_recherche = f"{self.BASE_URL}/schnellsuche/ergebnis/schnellsuche?query={quote(variante)}"
 
-            if url_recherche in urls_visitees:
-                continue
+    def _telecharger_lignes_recherche(self, url_recherche: str) -> Optional[List[dict]]:
+        table, depuis_cache = self._obtenir_table(url_recherche)
+        if not depuis_cache:
+            # Seules les pages réellement téléchargées renseignent sur un blocage
+            self.limiteur.signaler_page(vide=not table)
+        if not table:
+            return None
 
-            urls_visitees.add(url_recherche)
+        lignes_extraites = []
+        for ligne in self._lignes_resultats(table):
+            try:
+                ligne_extraite = self._extraire_ligne_resultat(ligne)
+                if ligne_extraite:
+                    lignes_extraites.append(ligne_extraite)
+            except Exception as e:
+                logger.error(
+                    f"Erreur lors de l'analyse d'une ligne: {str(e)}")
 
+        if self.index:
             try:
-                driver.get(url_recherche)
-                table = self._obtenir_table(driver)
-
-                if not table:
-                    logger.debug(
-                        f"Pas de résultats pour la variante: '{variante}'")
-                    continue
-
-                lignes = table.css("tr")
-
-                for ligne in lignes[1:]:
-                    try:
-                        resultat_analyse = self._analyser_ligne_resultat(
-                            ligne, nom_normalise, cache_resultats_normals)
-
-                        if not resultat_analyse:
-                            continue
-
-                        if (resultat_analyse['score'] >= 90 and
-                            (resultat_analyse['score'] > meilleur_score or
-                            (resultat_analyse['score'] == meilleur_score and
-                            resultat_analyse['resultat']['valeur'] >
-                            (meilleur_resultat['valeur'] if meilleur_resultat else -float('inf'))))):
-
-                            meilleur_score = resultat_analyse['score']
-                            meilleur_resultat = {
-                                **resultat_analyse['resultat'],
-                                'score': resultat_analyse['score']
-                            }
-                            meilleur_url_details = resultat_analyse['url_details']
-
-                    except Exception as e:
-                        logger.error(
-                            f"Erreur lors de l'analyse d'une ligne: {str(e)}")
-                        continue
+                self.index.ajouter(lignes_extraites)
+            except Exception as e:
+                logger.warning(f"Erreur lors de l'indexation des résultats: {e}")
+        return lignes_extraites
+
+
+    def _obtenir_lignes_recherche(self, url_recherche: str) -> Optional[List[dict]]:
+        """Lignes extraites d'une page de recherche, ou None si la page n'a pas de table.
+
+        Les workers qui demandent la même URL au même moment attendent un seul
+        téléchargement et se partagent les lignes extraites.
+        """
+        return self.requetes_en_vol.executer(
+            url_recherche, lambda: self._telecharger_lignes_recherche(url_recherche))
+
+
+    def _evaluer_lignes(self, lignes_extraites: List[dict], etat: EtatRecherche):
+        """Met à jour le meilleur candidat avec les lignes d'une page de résultats."""
+        for resultat_analyse in self._analyser_lignes_resultat(lignes_extraites, etat.nom_normalise):
+            etat.candidats.add(resultat_analyse['url_details'])
+
+            if (resultat_analyse['score'] > etat.score or
+                (resultat_analyse['score'] == etat.score and
+                resultat_analyse['resultat']['valeur'] >
+                (etat.resultat['valeur'] if etat.resultat else -float('inf')))):
+
+                etat.score = resultat_analyse['score']
+                etat.resultat = {
+                    **resultat_analyse['resultat'],
+                    'score': resultat_analyse['score']
+                }
+                etat.url_details = resultat_analyse['url_details']
+                etat.exact = (sorted(resultat_analyse['nom_normalise'].split()) ==
+                              sorted(etat.nom_normalise.split()))
+
+
+    def _recherche_terminee(self, etat: EtatRecherche) -> bool:
+        """Applique la politique de confiance et note la raison de l'arrêt."""
+        if not etat.resultat:
+            return False
+        if self.politique.arret_exact and etat.exact:
+            etat.raison_arret = "correspondance exacte"
+            return True
+        if etat.score >= self.politique.seuil_candidat_unique and len(etat.candidats) == 1:
+            etat.raison_arret = "candidat unique"
+            return True
+        return False
+
+
+    def _urls_a_visiter(self, variantes_recherche: list, etat: EtatRecherche):
+        """Produit les URLs de recherche restantes tant que la politique ne demande pas l'arrêt."""
+        for variante in variantes_recherche:
+            if self._recherche_terminee(etat):
+                return
+            if etat.requetes >= self.politique.budget_requetes:
+                etat.raison_arret = "budget epuise"
+                return
+
+            url_recherche = self._url_recherche(variante)
+            if url_recherche in etat.urls_visitees:
+                continue
+
+            etat.urls_visitees.add(url_recherche)
+            etat.requetes += 1
+            yield variante, url_recherche
+
+
+    def _traiter_page_recherche(self, lignes_extraites: Optional[List[dict]], variante: str, etat: EtatRecherche):
+        if lignes_extraites is None:
+            etat.pages_vides += 1
+            logger.debug(
+                f"Pas de résultats pour la variante: '{variante}'")
+            return
+        self._evaluer_lignes(lignes_extraites, etat)
+
+
+    def _rechercher_meilleur_resultat(self, variantes_recherche: list, nom_normalise: str):
+        """Recherche le meilleur résultat parmi les variantes, jusqu'à ce que la politique soit satisfaite."""
+        etat = EtatRecherche(nom_normalise)
 
+        for variante, url_recherche in self._urls_a_visiter(variantes_recherche, etat):
+            try:
+                self._traiter_page_recherche(
+                    self._obtenir_lignes_recherche(url_recherche), variante, etat)
             except Exception as e:
+                etat.echecs += 1
                 logger.error(
                     f"Erreur lors du traitement de la variante {variante}: {str(e)}")
                 continue
 
-        return meilleur_resultat, meilleur_url_details
+        self.statistiques_recherche[nom_normalise] = etat.statistiques()
+        return etat.resultat, etat.url_details
+
+
+    def _resoudre_par_index(self, nom_normalise: str):
+        """
+        Résultat et URL de détails d'un joueur que l'index local identifie sans ambiguïté,
+        ou None. La valeur marchande sera alors lue sur la page de détails.
+        """
+        if not self.index:
+            return None
+        try:
+            joueur = self.index.resoudre(nom_normalise, self.SEUIL_CORRESPONDANCE)
+        except Exception as e:
+            logger.warning(f"Erreur lors de la consultation de l'index local: {e}")
+            return None
+        if not joueur:
+            return None
+
+        self.statistiques_recherche[nom_normalise] = StatistiquesRecherche(
+            0, 0, 1, joueur.score, "index local")
+        resultat = {
+            'nom': joueur.nom,
+            'valeur': -1 if joueur.statut == "Fin de carrière" else None,
+            'statut': joueur.statut,
+            'score': joueur.score
+        }
+        return resultat, joueur.url_details
 
 
-    def _finaliser_valeur_joueur(self, driver, meilleur_resultat: dict, meilleur_url_details: str, nom_joueur: str) -> ValeurJoueur:
+    def _valeur_depuis_recherche(self, meilleur_resultat: dict, url_details: str,
+                                 nom_joueur: str) -> Optional[ValeurJoueur]:
+        """
+        ValeurJoueur construit sans la page de détails, lorsque la ligne de recherche et
+        les champs encore valides du cache couvrent `champs_requis` ; sinon None.
+        """
+        if meilleur_resultat['valeur'] is None:
+            # Joueur résolu par l'index local : la valeur est sur la page de détails
+            return None
+
+        fin_de_carriere = (meilleur_resultat['valeur'] == -1 or
+                           meilleur_resultat['statut'] == "Fin de carrière")
+        fin_contrat = "fin de carriere" if fin_de_carriere else None
+        date_naissance = None
+        champs_actualises = ['valeur', 'fin_contrat'] if fin_de_carriere else ['valeur']
+
+        manquants = [champ for champ in self.champs_requis if champ not in champs_actualises]
+        if manquants:
+            en_cache = self.cache.obtenir(nom_joueur, champs=manquants)
+            if en_cache is None or en_cache.url_details != url_details:
+                return None
+            if not fin_de_carriere:
+                fin_contrat = en_cache.fin_contrat
+            date_naissance = en_cache.date_naissance
+
+        return ValeurJoueur(
+            nom_joueur,
+            meilleur_resultat['nom'],
+            meilleur_resultat['valeur'],
+            meilleur_resultat['statut'],
+            fin_contrat,
+            date_naissance,
+            None,
+            None,
+            time.time(),
+            url_details,
+            club=meilleur_resultat.get('club'),
+            position=meilleur_resultat.get('position'),
+            champs_actualises=champs_actualises
+        )
+
+
+    def _construire_valeur_joueur(self, html_details: str, meilleur_resultat: dict, url_details: str,
+                                  nom_joueur: str) -> ValeurJoueur:
+        """Construit le ValeurJoueur à partir de la page de détails du joueur."""
+        with self.chronometre_etapes.mesurer("details.analyse"):
+            fin_de_carriere = (meilleur_resultat['valeur'] == -1 or
+                               meilleur_resultat['statut'] == "Fin de carrière")
+            details = extraire_details(html_details, chercher_fin_contrat=not fin_de_carriere)
+
+        date_naissance = details.date_naissance
+        if date_naissance is None:
+            logger.warning("Aucune date de naissance trouvée")
+
+        valeur = meilleur_resultat['valeur']
+        controle = None
+        if valeur is None:
+            # Joueur résolu par l'index local : la valeur n'est pas issue d'une recherche
+            valeur = details.valeur
+            if valeur is None:
+                # Ligne signalée et jamais mise en cache plutôt qu'une valeur nulle inventée
+                logger.warning("Aucune valeur marchande trouvée sur la page de détails")
+                controle = "A verifier"
+                valeur = 0.0
+
+        if fin_de_carriere:
+            fin_contrat = "fin de carriere"
+        else:
+            fin_contrat = details.fin_contrat
+            if fin_contrat is None:
+                logger.warning("Aucune date de fin de contrat trouvée")
+                fin_contrat = '?'
+
+        if self.index:
+            self.index.completer(url_details, date_naissance)
+
+        return ValeurJoueur(
+            nom_joueur,
+            meilleur_resultat['nom'],
+            valeur,
+            meilleur_resultat['statut'],
+            fin_contrat,
+            date_naissance,
+            controle,
+            None,
+            time.time(),
+            url_details,
+            club=details.club or meilleur_resultat.get('club'),
+            position=details.position or meilleur_resultat.get('position')
+        )
+
+
+    def _finaliser_valeur_joueur(self, meilleur_resultat: dict, meilleur_url_details: str, nom_joueur: str) -> ValeurJoueur:
         """Finalise la création du ValeurJoueur avec les informations détaillées."""
+        valeur = self._valeur_depuis_recherche(meilleur_resultat, meilleur_url_details, nom_joueur)
+        if valeur:
+            return valeur
         try:
-            driver.get(meilleur_url_details)
-            WebDriverWait(driver, 5)
-            self._traiter_popup(driver)
-            html = HTMLParser(driver.page_source)
-
-            date_naissance = self._parser_date_naissance(html)
-
-            if meilleur_resultat['valeur'] == -1 or meilleur_resultat['statut'] == "Fin de carrière":
-                fin_contrat = "fin de carriere"
-            else:
-                fin_contrat = self._parser_valeur_fin_contrat(html)
-
-            return ValeurJoueur(
-                nom_joueur,
-                meilleur_resultat['nom'],
-                meilleur_resultat['valeur'],
-                meilleur_resultat['statut'],
-                fin_contrat,
-                date_naissance,
-                None,
-                None,
-                time.time()
-            )
+            html = self.moteur.obtenir_html(meilleur_url_details)
+            return self._construire_valeur_joueur(
+                html, meilleur_resultat, meilleur_url_details, nom_joueur)
         except Exception as e:
             logger.error(
                 f"Erreur lors de la finalisation de ValeurJoueur: {str(e)}")
             raise
 
 
+    def _resoudre_sans_reseau(self, nom_joueur: str) -> Optional[ValeurJoueur]:
+        """Résout un joueur sans requête : nom trop court ou résultat encore valide en cache."""
+        if len(nom_joueur.strip()) < 7:
+            return self._creer_valeur_joueur_court(nom_joueur)
+        return self.cache.obtenir(nom_joueur, champs=self.champs_requis)
+
+
     def _scraper_valeur_joueur(self, nom_joueur: str) -> Optional[ValeurJoueur]:
         """Méthode principale de scraping des valeurs des joueurs."""
-        driver = self.pool_drivers.get()
         try:
-            if len(nom_joueur.strip()) < 7:
-                return self._creer_valeur_joueur_court(nom_joueur)
+            valeur = self._resoudre_sans_reseau(nom_joueur)
+            if valeur:
+                return valeur
 
             nom_normalise = self._normaliser_nom(nom_joueur)
+            resolution = self._resoudre_par_index(nom_normalise)
+            if resolution:
+                return self._finaliser_valeur_joueur(*resolution, nom_joueur)
+
             variantes_recherche = self._generer_variantes_recherche(nom_normalise)
 
             meilleur_resultat, meilleur_url_details = self._rechercher_meilleur_resultat(
-                driver, variantes_recherche, nom_normalise)
+                variantes_recherche, nom_normalise)
 
             if meilleur_resultat:
                 return self._finaliser_valeur_joueur(
-                    driver, meilleur_resultat, meilleur_url_details, nom_joueur)
+                    meilleur_resultat, meilleur_url_details, nom_joueur)
 
             logger.warning(f"Aucun résultat trouvé pour '{nom_joueur}'")
             return self._creer_valeur_joueur_erreur(
-                nom_joueur, f"Aucun joueur trouvé avec le nom {nom_joueur}")
+                nom_joueur, f"Aucun joueur trouvé avec le nom {nom_joueur}",
+                transitoire=self.statistiques_recherche[nom_normalise].echecs > 0)
 
         except Exception as e:
             logger.error(
                 f"Erreur globale lors du scraping de {nom_joueur}: {str(e)}")
-            return self._creer_valeur_joueur_erreur(nom_joueur, str(e))
+            return self._creer_valeur_joueur_erreur(nom_joueur, str(e), transitoire=True)
 
-        finally:
-            self.pool_drivers.put(driver)
 
+    def _enregistrer_resultat(self, valeur: ValeurJoueur, resultats: Dict[str, ValeurJoueur], compteurs: dict,
+                              rappel: Optional[Callable[[ValeurJoueur], None]] = None):
+        """Enregistre un résultat terminé, prévient l'appelant et affiche la progression."""
+        resultats[valeur.nom_original] = valeur
+        compteurs['traites'] += 1
 
-    def recuperer_valeurs_joueurs(self, noms_joueurs: List[str]) -> Dict[str, ValeurJoueur]:
-        self.joueurs_non_traites = []
+        if valeur.erreur is None:
+            if not valeur.depuis_cache and valeur.controle != "A verifier":
+                self.cache.definir(valeur.nom_original, valeur)
+            compteurs['reussis'] += 1
+        else:
+            self.joueurs_non_traites.append({
+                'nom': valeur.nom_original,
+                'erreur': valeur.erreur or 'Traitement incomplet'
+            })
 
-        resultats = {}
-        total_joueurs = len(noms_joueurs)
-        joueurs_traites = 0
-        mises_a_jour_reussies = 0
+            logger.warning(
+                f"Joueur non traité: {valeur.nom_original} - {valeur.erreur}")
+
+        if rappel:
+            rappel(valeur)
+
+        print(f"\nProgression - Joueurs traités : {compteurs['traites']}/{compteurs['total']}, "
+              f"Mises à jour réussies : {compteurs['reussis']}, "
+              f"Joueur en cours : {valeur.nom_original}")
+
+
+    def _afficher_joueurs_non_traites(self):
+        if self.joueurs_non_traites:
+            print("\n--- Joueurs non traités ---")
+            for joueur in self.joueurs_non_traites:
+                print(f"Nom: {joueur['nom']}, Erreur: {joueur['erreur']}")
+            print(
+                f"Total joueurs non traités : {len(self.joueurs_non_traites)}")
 
+
+    def _afficher_statistiques_recherche(self):
+        if not self.statistiques_recherche:
+            return
+        requetes = [stats.requetes for stats in self.statistiques_recherche.values()]
+        raisons = Counter(stats.raison_arret for stats in self.statistiques_recherche.values())
+        logger.info(
+            f"Requêtes de recherche par joueur - médiane : {median(requetes)}, "
+            f"max : {max(requetes)}, total : {sum(requetes)}")
+        logger.info(f"Raisons d'arrêt : {dict(raisons)}")
+        logger.info(
+            f"Pages de recherche partagées entre workers : {self.requetes_en_vol.appels_partages}")
+        logger.info(
+            f"Débit final : {self.limiteur.debit:.2f} requêtes/s, "
+            f"ralentissements : {dict(self.limiteur.ralentissements)}, "
+            f"joueurs relancés : {self.joueurs_relances}")
+        self.chronometre_etapes.afficher()
+
+
+    def cle_nom(self, nom_joueur: str) -> str:
+        """Clé d'identité d'un nom, insensible à la casse, aux accents et aux tirets."""
+        return cle_nom(nom_joueur)
+
+
+    def _regrouper_noms(self, noms_joueurs: List[str]) -> Dict[str, List[str]]:
+        """Regroupe les noms identiques à la casse, aux accents et aux tirets près.
+
+        La clé de chaque groupe est sa première orthographe rencontrée, qui sera la
+        seule scrapée ; les autres orthographes recevront une copie du résultat.
+        """
+        groupes = {}
+        representants = {}
+        for nom in noms_joueurs:
+            cle = self.cle_nom(nom)
+            representant = representants.setdefault(cle, nom)
+            orthographes = groupes.setdefault(representant, [])
+            if nom not in orthographes:
+                orthographes.append(nom)
+
+        doublons = len(noms_joueurs) - len(groupes)
+        if doublons:
+            logger.info(
+                f"{doublons} doublons regroupés : {len(groupes)} joueurs uniques à traiter")
+        return groupes
+
+
+    def _cout_estime(self, nom_joueur: str) -> int:
+        """
+        Requêtes attendues : 0 si le joueur se résout sans réseau, sinon une par variante
+        planifiée. Une cellule vide (NaN) ne coûte rien : elle finira en ligne d'erreur.
+        """
+        if not isinstance(nom_joueur, str) or self._resoudre_sans_reseau(nom_joueur):
+            return 0
+        return len(self._generer_variantes_recherche(self._normaliser_nom(nom_joueur)))
+
+
+    def _ordonner_noms(self, groupes: Dict[str, List[str]],
+                       priorites: Optional[Dict[str, float]] = None) -> List[str]:
+        """
+        Ordre de traitement des représentants : priorité métier (la plus petite valeur
+        d'abord, les noms sans priorité en dernier), puis coût estimé et nombre de mots
+        croissants, puis ordre d'entrée. Noms courts et joueurs en cache passent ainsi avant les noms
+        longs à nombreuses variantes.
+        """
+        priorites = priorites or {}
+
+        def rang(representant: str):
+            valeurs = [priorites[nom] for nom in groupes[representant]
+                       if priorites.get(nom) is not None and priorites[nom] == priorites[nom]]
+            return (min(valeurs) if valeurs else float('inf'), self._cout_estime(representant),
+                    len(str(representant).split()))
+
+        return sorted(groupes, key=rang)
+
+
+    def _diffuser_resultats(self, resultats: Dict[str, ValeurJoueur], groupes: Dict[str, List[str]]):
+        """Recopie le résultat de chaque représentant vers les autres orthographes du groupe."""
+        for representant, orthographes in groupes.items():
+            valeur = resultats.get(representant)
+            if valeur is None:
+                continue
+            for nom in orthographes[1:]:
+                resultats[nom] = replace(valeur, nom_original=nom)
+
+
+    def _differer_si_transitoire(self, valeur: ValeurJoueur, a_relancer: List[str],
+                                 derniere_tentative: bool) -> bool:
+        """Met de côté un échec transitoire pour la tentative suivante au lieu de l'enregistrer."""
+        transitoire = valeur.erreur is not None and valeur.nom_original in self.echecs_transitoires
+        self.echecs_transitoires.discard(valeur.nom_original)
+        if transitoire and not derniere_tentative:
+            a_relancer.append(valeur.nom_original)
+            return True
+        return False
+
+
+    def _delai_avant_relance(self, noms: List[str], tentative: int) -> float:
+        self.joueurs_relances += len(noms)
+        delai = delai_reessai(tentative)
+        logger.info(
+            f"Relance {tentative}/{self.max_tentatives} de {len(noms)} joueurs "
+            f"en échec transitoire dans {delai:.0f}s")
+        return delai
+
+
+    def _executer_lot(self, noms: List[str], enregistrer: Callable[[ValeurJoueur], None],
+                      derniere_tentative: bool) -> List[str]:
+        """Scrape `noms` en parallèle et retourne les joueurs à relancer."""
+        a_relancer = []
         with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
             futures = {executor.submit(
-                self._scraper_valeur_joueur, nom): nom for nom in noms_joueurs}
+                self._scraper_valeur_joueur, nom): nom for nom in noms}
             for future in as_completed(futures):
                 try:
                     valeur = future.result()
-                    resultats[valeur.nom_original] = valeur
-
-                    joueurs_traites += 1
-
-                    if valeur.valeur > 0 or valeur.statut != "inconnu":
-                        self.cache.definir(valeur.nom_original, valeur)
-                        mises_a_jour_reussies += 1
-                    else:
-                        self.joueurs_non_traites.append({
-                            'nom': valeur.nom_original,
-                            'erreur': valeur.erreur or 'Traitement incomplet'
-                        })
-
-                        logger.warning(
-                            f"Joueur non traité: {valeur.nom_original} - {valeur.erreur}")
-
+                    if not self._differer_si_transitoire(valeur, a_relancer, derniere_tentative):
+                        enregistrer(valeur)
                 except Exception as e:
-
                     logger.error(f"Erreur inattendue pour un joueur: {e}")
                     self.joueurs_non_traites.append({
                         'nom': futures[future],
                         'erreur': str(e)
                     })
+        return a_relancer
 
-                print(f"\nProgression - Joueurs traités : {joueurs_traites}/{total_joueurs}, "
-                      f"Mises à jour réussies : {mises_a_jour_reussies}, "
-                      f"Joueur en cours : {valeur.nom_original}")
 
-        if self.joueurs_non_traites:
-            print("\n--- Joueurs non traités ---")
-            for joueur in self.joueurs_non_traites:
-                print(f"Nom: {joueur['nom']}, Erreur: {joueur['erreur']}")
-            print(
-                f"Total joueurs non traités : {len(self.joueurs_non_traites)}")
+    def recuperer_valeurs_joueurs(self, noms_joueurs: List[str],
+                                  rappel_resultat: Optional[Callable[[ValeurJoueur], None]] = None,
+                                  priorites: Optional[Dict[str, float]] = None
+                                  ) -> Dict[str, ValeurJoueur]:
+        self.joueurs_non_traites = []
+        self.statistiques_recherche = {}
+        self.echecs_transitoires = set()
+        self.joueurs_relances = 0
+        self.chronometre_etapes.reinitialiser()
+
+        resultats = {}
+        groupes = self._regrouper_noms(noms_joueurs)
+        compteurs = {'total': len(groupes), 'traites': 0, 'reussis': 0}
+        enregistrer = partial(self._enregistrer_resultat, resultats=resultats,
+                              compteurs=compteurs, rappel=rappel_resultat)
+
+        a_traiter = self._ordonner_noms(groupes, priorites)
+        for tentative in range(self.max_tentatives + 1):
+            if tentative:
+                time.sleep(self._delai_avant_relance(a_traiter, tentative))
+            a_traiter = self._executer_lot(
+                a_traiter, enregistrer, derniere_tentative=tentative == self.max_tentatives)
+            if not a_traiter:
+                break
+
+        self._diffuser_resultats(resultats, groupes)
+        self._afficher_joueurs_non_traites()
+        self._afficher_statistiques_recherche()
+
+        return resultats
+
+
+    async def _executer_lot_async(
+        self,
+        noms: List[str],
+        enregistrer: Callable[[ValeurJoueur], None],
+        derniere_tentative: bool,
+        concurrence_recherche: int,
+        concurrence_details: int,
+        concurrence_analyse: int,
+        limite_globale: int
+    ) -> List[str]:
+        """
+        Fait passer `noms` dans le pipeline asyncio et retourne les joueurs à relancer.
+
+        Aucun accès disque ne bloque la boucle : les consultations SQLite (cache, index)
+        passent par un petit pool de threads, et les résultats terminés sont enregistrés
+        (cache, journal, CSV) par un unique thread d'écriture, dans l'ordre d'arrivée.
+        """
+        a_relancer = []
+        limite = asyncio.Semaphore(limite_globale)
+        boucle = asyncio.get_running_loop()
+        executeur = ThreadPoolExecutor(max_workers=limite_globale + concurrence_analyse)
+        consultations = ThreadPoolExecutor(max_workers=self.THREADS_CONSULTATION)
+        ecrivain = ThreadPoolExecutor(max_workers=1)
+
+        file_recherche = asyncio.Queue()
+        file_details = asyncio.Queue(maxsize=concurrence_details * 2)
+        file_analyse = asyncio.Queue(maxsize=concurrence_analyse * 2)
+
+        def terminer(valeur: ValeurJoueur):
+            if not self._differer_si_transitoire(valeur, a_relancer, derniere_tentative):
+                ecrivain.submit(enregistrer, valeur).add_done_callback(
+                    partial(self._signaler_echec_enregistrement, valeur.nom_original))
+
+        async def executer_requete(fonction, url: str):
+            async with limite:
+                return await boucle.run_in_executor(executeur, fonction, url)
+
+        async def consulter(fonction, *args):
+            return await boucle.run_in_executor(consultations, fonction, *args)
+
+        async def etape_recherche():
+            while True:
+                nom_joueur = await file_recherche.get()
+                try:
+                    valeur = await consulter(self._resoudre_sans_reseau, nom_joueur)
+                    if valeur:
+                        terminer(valeur)
+                        continue
+
+                    nom_normalise = self._normaliser_nom(nom_joueur)
+                    resolution = await consulter(self._resoudre_par_index, nom_normalise)
+                    if resolution:
+                        await file_details.put((nom_joueur, *resolution))
+                        continue
+
+                    etat = EtatRecherche(nom_normalise)
+                    variantes_recherche = self._generer_variantes_recherche(etat.nom_normalise)
+                    for variante, url_recherche in self._urls_a_visiter(variantes_recherche, etat):
+                        try:
+                            lignes_extraites = await executer_requete(
+                                self._obtenir_lignes_recherche, url_recherche)
+                            self._traiter_page_recherche(lignes_extraites, variante, etat)
+                        except Exception as e:
+                            etat.echecs += 1
+                            logger.error(
+                                f"Erreur lors du traitement de la variante {variante}: {str(e)}")
+                    self.statistiques_recherche[etat.nom_normalise] = etat.statistiques()
+
+                    if not etat.resultat:
+                        logger.warning(f"Aucun résultat trouvé pour '{nom_joueur}'")
+                        terminer(self._creer_valeur_joueur_erreur(
+                            nom_joueur, f"Aucun joueur trouvé avec le nom {nom_joueur}",
+                            transitoire=etat.echecs > 0))
+                        continue
+
+                    valeur = await consulter(
+                        self._valeur_depuis_recherche, etat.resultat, etat.url_details, nom_joueur)
+                    if valeur:
+                        terminer(valeur)
+                    else:
+                        await file_details.put((nom_joueur, etat.resultat, etat.url_details))
+                except Exception as e:
+                    logger.error(
+                        f"Erreur globale lors du scraping de {nom_joueur}: {str(e)}")
+                    terminer(self._creer_valeur_joueur_erreur(nom_joueur, str(e), transitoire=True))
+                finally:
+                    file_recherche.task_done()
+
+        async def etape_details():
+            while True:
+                nom_joueur, meilleur_resultat, url_details = await file_details.get()
+                try:
+                    html = await executer_requete(self.moteur.obtenir_html, url_details)
+                    await file_analyse.put((nom_joueur, meilleur_resultat, url_details, html))
+                except Exception as e:
+                    logger.error(
+                        f"Erreur lors de la finalisation de ValeurJoueur: {str(e)}")
+                    terminer(self._creer_valeur_joueur_erreur(nom_joueur, str(e), transitoire=True))
+                finally:
+                    file_details.task_done()
+
+        async def etape_analyse():
+            while True:
+                nom_joueur, meilleur_resultat, url_details, html = await file_analyse.get()
+                try:
+                    valeur = await boucle.run_in_executor(
+                        executeur, lambda: self._construire_valeur_joueur(
+                            html, meilleur_resultat, url_details, nom_joueur))
+                    terminer(valeur)
+                except Exception as e:
+                    logger.error(
+                        f"Erreur lors de l'analyse de la page de {nom_joueur}: {str(e)}")
+                    terminer(self._creer_valeur_joueur_erreur(nom_joueur, str(e)))
+                finally:
+                    file_analyse.task_done()
+
+        for nom in noms:
+            file_recherche.put_nowait(nom)
+
+        workers = (
+            [asyncio.create_task(etape_recherche()) for _ in range(concurrence_recherche)] +
+            [asyncio.create_task(etape_details()) for _ in range(concurrence_details)] +
+            [asyncio.create_task(etape_analyse()) for _ in range(concurrence_analyse)]
+        )
+        try:
+            await file_recherche.join()
+            await file_details.join()
+            await file_analyse.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            executeur.shutdown(wait=False)
+            consultations.shutdown(wait=False)
+            # Les résultats du lot doivent être enregistrés avant la relance ou le retour
+            await boucle.run_in_executor(None, ecrivain.shutdown)
+
+        return a_relancer
+
+
+    def _signaler_echec_enregistrement(self, nom_joueur: str, future):
+        if future.exception():
+            logger.error(f"Erreur lors de l'enregistrement de {nom_joueur}: {future.exception()}")
+
+
+    async def recuperer_valeurs_joueurs_async(
+        self,
+        noms_joueurs: List[str],
+        concurrence_recherche: int = 24,
+        concurrence_details: int = 12,
+        concurrence_analyse: int = 2,
+        limite_globale: int = 24,
+        rappel_resultat: Optional[Callable[[ValeurJoueur], None]] = None,
+        priorites: Optional[Dict[str, float]] = None
+    ) -> Dict[str, ValeurJoueur]:
+        """Version asyncio du scraping, organisée en étapes pipelinées.
+
+        Recherche, téléchargement des pages de détails et analyse HTML sont des
+        étapes distinctes reliées par des files, chacune avec son propre nombre
+        de workers. Le sémaphore `limite_globale` borne le nombre total de
+        requêtes en vol vers le site, toutes étapes confondues, et le limiteur
+        de débit partagé espace ces requêtes dans le temps. Les joueurs en échec
+        transitoire repassent dans le pipeline en fin de lot.
+
+        Les joueurs entrent dans la file de recherche dans l'ordre de `_ordonner_noms`
+        (`priorites` : priorité métier par nom, la plus petite d'abord) ; chaque
+        worker libre prend le suivant dans cette file commune.
+        """
+        self.joueurs_non_traites = []
+        self.statistiques_recherche = {}
+        self.echecs_transitoires = set()
+        self.joueurs_relances = 0
+        self.chronometre_etapes.reinitialiser()
+
+        resultats = {}
+        groupes = self._regrouper_noms(noms_joueurs)
+        compteurs = {'total': len(groupes), 'traites': 0, 'reussis': 0}
+        enregistrer = partial(self._enregistrer_resultat, resultats=resultats,
+                              compteurs=compteurs, rappel=rappel_resultat)
+
+        a_traiter = self._ordonner_noms(groupes, priorites)
+        for tentative in range(self.max_tentatives + 1):
+            if tentative:
+                await asyncio.sleep(self._delai_avant_relance(a_traiter, tentative))
+            a_traiter = await self._executer_lot_async(
+                a_traiter, enregistrer, tentative == self.max_tentatives,
+                concurrence_recherche, concurrence_details, concurrence_analyse, limite_globale)
+            if not a_traiter:
+                break
+
+        self._diffuser_resultats(resultats, groupes)
+        self._afficher_joueurs_non_traites()
+        self._afficher_statistiques_recherche()
 
         return resultats
 
 
     def fermer(self):
-        while not self.pool_drivers.empty():
-            driver = self.pool_drivers.get()
-            driver.quit()
+        self.moteur.fermer()
+        if self.index:
+            self.index.fermer()
@@ -1,14 +1,19 @@
 from loguru import logger
+import argparse
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import glob
+import os
 import time
 import sys
 import threading
+import zlib
 import pandas as pd
-from openpyxl.utils import get_column_letter
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-from players import ScraperTransferMarkt
+from players import CHAMPS_JOUEUR, ScraperTransferMarkt
+from journal import JournalExecution
+from normalisation import cle_nom
+from sortie import EcrivainSortie, resultats_depuis_partiels, transformer_resultats
 
 # Configuration du logger
 logger.remove()
@@ -17,6 +22,22 @@ logger.add(sys.stdout, level="INFO", colorize=True,
 logger.add("logs/fichier.log", level="ERROR",
            format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}", rotation="1 MB")
 
+# PRIORITE (facultative) : 1 est traité en premier, les lignes sans priorité en dernier
+COLONNES_ENTREE = ("NOM", "PRIORITE")
+# Requêtes par seconde pour tout le run, réparties entre les shards
+DEBIT_REQUETES = 4.0
+# Requêtes simultanées vers le site, par processus
+REQUETES_SIMULTANEES = 24
+
+
+def parametres_concurrence(requetes_simultanees: int) -> dict:
+    """Concurrence du pipeline asynchrone pour `requetes_simultanees` requêtes en vol."""
+    return {
+        "concurrence_recherche": requetes_simultanees,
+        "concurrence_details": max(1, requetes_simultanees // 2),
+        "limite_globale": requetes_simultanees,
+    }
+
 
 class RealTimeChronometre:
     def __init__(self):
@@ -46,137 +67,155 @@ class RealTimeChronometre:
         return temps_total
 
 
+def executer_shard(indice, noms, fichier_sortie, reprendre, champs_requis, priorites,
+                   requetes_simultanees, debit_requetes):
+    """
+    Traite une partie des noms dans un processus dédié, avec son propre scraper.
+
+    Chaque shard a son journal et son CSV partiel, relus ensuite par le processus
+    principal ; les caches SQLite sont partagés entre les processus (mode WAL).
+    Retourne le nombre de joueurs traités.
+    """
+    prefixe = f"{fichier_sortie}.shard{indice}"
+    scraper = ScraperTransferMarkt(max_threads=requetes_simultanees, champs_requis=champs_requis,
+                                   debit_requetes=debit_requetes)
+    journal = JournalExecution(f"{prefixe}.journal.jsonl")
+    sortie = EcrivainSortie(prefixe)
+
+    def enregistrer(valeur_joueur):
+        # CSV d'abord : tout joueur journalisé (donc sauté à la reprise) a sa ligne
+        sortie.ajouter(valeur_joueur)
+        journal.enregistrer(valeur_joueur)
+
+    logger.info(f"Shard {indice} : {len(noms)} joueurs")
+    journal.ouvrir(reprendre)
+    sortie.ouvrir(reprendre)
+    try:
+        valeurs_joueurs = asyncio.run(scraper.recuperer_valeurs_joueurs_async(
+            noms, rappel_resultat=enregistrer, priorites=priorites,
+            **parametres_concurrence(requetes_simultanees)))
+        return len(valeurs_joueurs)
+    finally:
+        journal.fermer()
+        sortie.fermer()
+        scraper.cache.fermer()
+        scraper.fermer()
+
+
 class MiseAJourValeursJoueurs:
-    def __init__(self, fichier_entree: str, fichier_sortie: str):
+    def __init__(self, fichier_entree: str, fichier_sortie: str, reprendre: bool = False,
+                 champs_requis=CHAMPS_JOUEUR, shards: int = 1,
+                 requetes_simultanees: int = REQUETES_SIMULTANEES):
         self.fichier_entree = fichier_entree
         self.fichier_sortie = fichier_sortie
-        self.scraper = ScraperTransferMarkt(max_threads=3)
+        self.reprendre = reprendre
+        self.champs_requis = champs_requis
+        self.shards = max(1, shards)
+        self.requetes_simultanees = requetes_simultanees
+        # En mode shards, chaque processus crée son propre scraper
+        self.scraper = None
+        if self.shards == 1:
+            self.scraper = ScraperTransferMarkt(
+                max_threads=requetes_simultanees, champs_requis=champs_requis)
+        self.journal = JournalExecution(f"{fichier_sortie}.journal.jsonl")
+        self.sortie = EcrivainSortie(fichier_sortie)
         self.chronometre = RealTimeChronometre()
 
-    def formater_nom2(self, nom_original: str) -> str:
-        parties = nom_original.split()
-        index_majuscule = next(
-            (i for i, mot in enumerate(parties) if mot.isupper()), None)
-
-        if index_majuscule is not None:
-            mot_majuscule = parties[index_majuscule]
-            autres_parties = parties[:index_majuscule] + \
-                parties[index_majuscule+1:]
-            return f"{mot_majuscule} {' '.join(autres_parties)}"
-
-        return nom_original
-
-
-    def inverser_nom(self, nom: str) -> str:
-        if not nom:
-            return ""
-        mots = nom.split()
-        return " ".join(mots[::-1])
-
+    def _journaux_shards(self):
+        return glob.glob(glob.escape(self.fichier_sortie) + ".shard*.journal.jsonl")
+
+    def _nettoyer_journaux(self):
+        """
+        Supprime les journaux et CSV partiels d'un run précédent, principaux comme de
+        shards, pour qu'une reprise ultérieure ne mélange pas deux runs.
+        """
+        motif = glob.escape(self.fichier_sortie) + ".shard*"
+        chemins = [self.journal.chemin, self.sortie.chemin_partiel]
+        chemins += glob.glob(motif + ".journal.jsonl") + glob.glob(motif + ".partiel.csv")
+        for chemin in chemins:
+            if os.path.exists(chemin):
+                os.remove(chemin)
+
+    async def _scraper_en_shards(self, noms, priorites):
+        """
+        Répartit les noms entre `shards` processus selon un hachage de leur clé, pour
+        qu'un même joueur tombe toujours dans le même shard. Les résultats restent dans
+        les CSV partiels des shards.
+        """
+        parties = [[] for _ in range(self.shards)]
+        for nom in noms:
+            parties[zlib.crc32(cle_nom(nom).encode()) % self.shards].append(nom)
+
+        boucle = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=self.shards) as executeur:
+            taches = [
+                boucle.run_in_executor(
+                    executeur, executer_shard, indice, partie, self.fichier_sortie,
+                    self.reprendre, self.champs_requis,
+                    {nom: priorites[nom] for nom in partie if nom in priorites} if priorites else None,
+                    self.requetes_simultanees, DEBIT_REQUETES / self.shards)
+                for indice, partie in enumerate(parties) if partie
+            ]
+            traites = await asyncio.gather(*taches)
+        logger.info(f"Shards terminés : {sum(traites)} joueurs traités")
 
     async def mettre_a_jour(self):
         logger.info("Début du Processus")
         self.chronometre.demarrer()
 
-        df = pd.read_excel(self.fichier_entree, dtype={"NOM": str})
+        df = pd.read_excel(self.fichier_entree, usecols=lambda colonne: colonne in COLONNES_ENTREE,
+                           dtype={"NOM": str})
         noms_joueurs = df["NOM"].tolist()
+        priorites = None
+        if "PRIORITE" in df.columns:
+            priorites = (pd.to_numeric(df["PRIORITE"], errors="coerce")
+                         .groupby(df["NOM"]).min().dropna().to_dict())
+
+        valeurs_reprises = {}
+        if self.reprendre:
+            journaux = [self.journal] + [JournalExecution(chemin) for chemin in self._journaux_shards()]
+            valeurs_reprises = {
+                cle_nom(nom): valeur
+                for journal in journaux
+                for nom, valeur in journal.charger().items()
+            }
+            logger.info(f"Reprise : {len(valeurs_reprises)} joueurs déjà traités dans le journal")
+        noms_restants = [
+            nom for nom in noms_joueurs if cle_nom(nom) not in valeurs_reprises]
+
+        date_courante = datetime.now().strftime("%d/%m/%Y")
+
+        def enregistrer(valeur_joueur):
+            # CSV d'abord : tout joueur journalisé (donc sauté à la reprise) a sa ligne
+            self.sortie.ajouter(valeur_joueur)
+            self.journal.enregistrer(valeur_joueur)
+
+        if not self.reprendre:
+            self._nettoyer_journaux()
 
         try:
-            valeurs_joueurs = await asyncio.to_thread(
-                self.scraper.recuperer_valeurs_joueurs,
-                noms_joueurs
-            )
+            if self.shards > 1:
+                await self._scraper_en_shards(noms_restants, priorites)
+            else:
+                self.journal.ouvrir(self.reprendre)
+                self.sortie.ouvrir(self.reprendre)
+                try:
+                    await self.scraper.recuperer_valeurs_joueurs_async(
+                        noms_restants, rappel_resultat=enregistrer, priorites=priorites,
+                        **parametres_concurrence(self.requetes_simultanees))
+                finally:
+                    self.journal.fermer()
+                    self.sortie.fermer()
         except Exception as e:
             logger.error(f"Erreur durant le scraping : {e}")
             self.chronometre.arreter()
             raise
 
-        donnees_mises_a_jour = []
-        date_courante = datetime.now().strftime("%d/%m/%Y")
-
-        for _, ligne in df.iterrows():
-            nom = ligne["NOM"]
-            valeur_joueur = valeurs_joueurs.get(nom, None)
-
-            if valeur_joueur and valeur_joueur.controle == "A verifier":
-                donnees = {
-                    "NOM": nom,
-                    "NOM_INVERSE": "",
-                    "DOB": "",
-                    "DATE": date_courante,
-                    "VALEUR": "",
-                    "NOM2": "",
-                    "FIN-CONTRAT": "",
-                    "CONTROLE": "A verifier"
-                }
-            else:
-                if valeur_joueur and valeur_joueur.nom_transfermarkt:
-                    parties_nom = valeur_joueur.nom_transfermarkt.split()
-                    if len(parties_nom) >= 3:
-                        nom2 = f"{parties_nom[-2].upper()} {parties_nom[-1].upper()} {' '.join(parties_nom[:-2])}"
-                    else:
-                        nom2 = f"{parties_nom[-1].upper()} {' '.join(parties_nom[:-1])}"
-                    nom_joueur = valeur_joueur.nom_transfermarkt
-                else:
-                    nom2 = self.formater_nom2(nom)
-                    nom_joueur = nom
-
-                donnees = {
-                    "NOM": nom_joueur,
-                    "NOM_INVERSE": self.inverser_nom(nom_joueur),
-                    "DOB": valeur_joueur.date_naissance if valeur_joueur and valeur_joueur.date_naissance else "",
-                    "DATE": date_courante,
-                    "VALEUR": valeur_joueur.valeur if valeur_joueur else 0.0,
-                    "NOM2": nom2,
-                    "FIN-CONTRAT": valeur_joueur.fin_contrat if valeur_joueur and valeur_joueur.fin_contrat else "",
-                    "CONTROLE": valeur_joueur.controle if valeur_joueur else ""
-                }
-            donnees_mises_a_jour.append(donnees)
-
-        df_mise_a_jour = pd.DataFrame(donnees_mises_a_jour)
-
-        colonnes = ["NOM", "NOM_INVERSE", "DOB", "DATE", "VALEUR",
-                    "NOM2", "FIN-CONTRAT", "CONTROLE"]
-        for col in colonnes:
-            if col not in df_mise_a_jour.columns:
-                df_mise_a_jour[col] = ""
-
-        df_mise_a_jour = df_mise_a_jour[colonnes]
-
-        with pd.ExcelWriter(self.fichier_sortie, engine='openpyxl') as writer:
-            df_mise_a_jour.to_excel(writer, index=False, sheet_name='Sheet1')
-
-            workbook = writer.book
-            worksheet = workbook['Sheet1']
-
-            for column in worksheet.columns:
-                max_length = 0
-                column = list(column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2)
-                worksheet.column_dimensions[column[0]
-                                            .column_letter].width = adjusted_width
-
-            yellow_fill = PatternFill(start_color="FFFF00",
-                                      end_color="FFFF00",
-                                      fill_type="solid")
-
-            controle_col = None
-            for idx, col in enumerate(worksheet[1], 1):
-                if col.value == "CONTROLE":
-                    controle_col = idx
-                    break
-
-            if controle_col:
-                for row in worksheet.iter_rows(min_row=2):
-                    if row[controle_col-1].value == "A verifier":
-                        for cell in row:
-                            cell.fill = yellow_fill
+        # Les CSV partiels contiennent aussi les joueurs des runs repris
+        chemins_partiels = [self.sortie.chemin_partiel] + sorted(
+            glob.glob(glob.escape(self.fichier_sortie) + ".shard*.partiel.csv"))
+        resultats = resultats_depuis_partiels(noms_joueurs, chemins_partiels, cle_nom)
+        self.sortie.ecrire_classeur(transformer_resultats(resultats, date_courante))
 
         temps_total = self.chronometre.arreter()
         logger.info(
@@ -185,16 +224,32 @@ class MiseAJourValeursJoueurs:
 
 
 async def main():
-    fichier_entree = "Fichier-Transf4.xls"
-    fichier_sortie = "resultat_avec_inversion.xlsx"
-
-    mise_a_jour = MiseAJourValeursJoueurs(fichier_entree, fichier_sortie)
+    parser = argparse.ArgumentParser(
+        description="Met à jour les valeurs marchandes des joueurs depuis Transfermarkt")
+    parser.add_argument("--entree", default="Fichier-Transf4.xls")
+    parser.add_argument("--sortie", default="resultat_avec_inversion.xlsx")
+    parser.add_argument("--resume", action="store_true",
+                        help="reprend un run interrompu à partir de son journal")
+    parser.add_argument("--valeur-seule", action="store_true",
+                        help="met à jour uniquement les valeurs, sans page de détails des joueurs")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="nombre de processus entre lesquels répartir les joueurs")
+    parser.add_argument("--threads", type=int, default=REQUETES_SIMULTANEES,
+                        help="requêtes simultanées vers le site par processus")
+    args = parser.parse_args()
+
+    champs_requis = ("valeur",) if args.valeur_seule else CHAMPS_JOUEUR
+    mise_a_jour = MiseAJourValeursJoueurs(args.entree, args.sortie, reprendre=args.resume,
+                                          champs_requis=champs_requis, shards=args.shards,
+                                          requetes_simultanees=args.threads)
     try:
         await mise_a_jour.mettre_a_jour()
     except Exception as e:
         logger.error(f"Une erreur s'est produite : {e}")
     finally:
-        mise_a_jour.scraper.cache.fermer()
+        if mise_a_jour.scraper:
+            mise_a_jour.scraper.cache.fermer()
+            mise_a_jour.scraper.fermer()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,140 @@
+import csv
+import os
+import threading
+from typing import Callable, Iterable, List
+
+import pandas as pd
+
+from formatage import ecrire_xlsx
+from noms import formater_noms2, formater_noms_transfermarkt, inverser_noms
+from players import ValeurJoueur
+
+
+COLONNES_SORTIE = ["NOM", "NOM_INVERSE", "DOB", "DATE", "VALEUR",
+                   "NOM2", "FIN-CONTRAT", "CONTROLE"]
+
+
+CHAMPS_RESULTAT = ["nom_original", "nom_transfermarkt", "valeur", "statut",
+                   "fin_contrat", "date_naissance", "controle", "erreur"]
+
+
+def lire_partiels(chemins: Iterable[str]) -> pd.DataFrame:
+    """Concatène les CSV partiels existants ; seule une cellule vide est lue comme manquante."""
+    parties = [
+        pd.read_csv(chemin, dtype=str, keep_default_na=False, na_values=[""])
+        for chemin in chemins if os.path.exists(chemin)
+    ]
+    if not parties:
+        return pd.DataFrame(columns=CHAMPS_RESULTAT)
+    partiels = pd.concat(parties, ignore_index=True)
+    partiels["valeur"] = pd.to_numeric(partiels["valeur"], errors="coerce")
+    return partiels
+
+
+def resultats_depuis_partiels(noms: List[str], chemins: Iterable[str],
+                              cle_nom: Callable[[str], str]) -> pd.DataFrame:
+    """
+    Une ligne par nom d'entrée, avec les champs de la dernière ligne des CSV partiels
+    dont la clé `cle_nom` correspond ; les lignes sans erreur l'emportent sur les autres.
+    """
+    partiels = lire_partiels(chemins)
+    cles = {nom: cle_nom(nom) for nom in pd.unique(partiels["nom_original"].dropna())}
+    partiels["cle"] = partiels["nom_original"].map(cles)
+    partiels = (partiels.assign(sans_erreur=partiels["erreur"].isna())
+                .sort_values("sans_erreur", kind="stable")
+                .drop_duplicates("cle", keep="last")
+                .drop(columns=["nom_original", "sans_erreur"]))
+
+    entree = pd.DataFrame({"nom_original": noms})
+    cles_entree = {nom: cle_nom(nom) for nom in pd.unique(entree["nom_original"])}
+    entree["cle"] = entree["nom_original"].map(cles_entree)
+    resultats = entree.merge(partiels, on="cle", how="left", indicator=True)
+    resultats["trouve"] = resultats["_merge"].eq("both")
+    return resultats[CHAMPS_RESULTAT + ["trouve"]]
+
+
+def transformer_resultats(resultats: pd.DataFrame, date_courante: str) -> pd.DataFrame:
+    """Transforme les résultats bruts en colonnes du classeur de sortie, sans boucle par ligne."""
+    trouve = resultats["trouve"].astype(bool)
+    a_verifier = resultats["controle"].eq("A verifier")
+    avec_nom_transfermarkt = trouve & resultats["nom_transfermarkt"].fillna("").ne("")
+
+    nom_joueur = resultats["nom_transfermarkt"].where(
+        avec_nom_transfermarkt, resultats["nom_original"])
+    nom2 = pd.concat([
+        formater_noms_transfermarkt(resultats.loc[avec_nom_transfermarkt, "nom_transfermarkt"]),
+        formater_noms2(resultats.loc[~avec_nom_transfermarkt, "nom_original"]),
+    ]).reindex(resultats.index)
+
+    sortie = pd.DataFrame({
+        "NOM": nom_joueur,
+        "NOM_INVERSE": inverser_noms(nom_joueur.fillna("")),
+        "DOB": resultats["date_naissance"].fillna(""),
+        "DATE": date_courante,
+        "VALEUR": resultats["valeur"].where(trouve, 0.0),
+        "NOM2": nom2,
+        "FIN-CONTRAT": resultats["fin_contrat"].fillna(""),
+        "CONTROLE": resultats["controle"].fillna(""),
+    }, columns=COLONNES_SORTIE)
+
+    sortie = sortie.astype(object)
+    sortie.loc[a_verifier, ["NOM_INVERSE", "DOB", "VALEUR", "NOM2", "FIN-CONTRAT"]] = ""
+    sortie.loc[a_verifier, "NOM"] = resultats.loc[a_verifier, "nom_original"]
+    return sortie
+
+
+class EcrivainSortie:
+    """
+    Écrit la sortie au fil de l'eau dans un CSV annexe, puis produit le classeur final.
+
+    Le CSV `<sortie>.partiel.csv` reçoit les champs bruts de chaque joueur terminé,
+    écrits sur disque avant le journal, et peut être consulté pendant le run. Le classeur XLSX est construit à la fin à
+    partir de ce CSV (et de ceux des shards), puis écrit en mode write-only, ligne
+    par ligne, sans classeur complet en mémoire.
+    """
+
+    def __init__(self, fichier_sortie: str):
+        self.fichier_sortie = fichier_sortie
+        self.chemin_partiel = f"{fichier_sortie}.partiel.csv"
+        self._verrou = threading.Lock()
+        self._fichier = None
+        self._csv = None
+
+    def _tronquer_ligne_incomplete(self):
+        """Retire la dernière ligne du CSV si un arrêt brutal l'a laissée sans fin de ligne."""
+        with open(self.chemin_partiel, "rb+") as fichier:
+            fichier.seek(0, os.SEEK_END)
+            taille = fichier.tell()
+            if taille == 0:
+                return
+            fichier.seek(max(0, taille - 65536))
+            fin = fichier.read()
+            if fin.endswith(b"\n"):
+                return
+            fichier.truncate(taille - len(fin) + fin.rfind(b"\n") + 1)
+
+    def ouvrir(self, reprendre: bool = False):
+        ajout = reprendre and os.path.exists(self.chemin_partiel)
+        if ajout:
+            self._tronquer_ligne_incomplete()
+        self._fichier = open(self.chemin_partiel, "a" if ajout else "w",
+                             newline="", encoding="utf-8")
+        self._csv = csv.DictWriter(self._fichier, fieldnames=CHAMPS_RESULTAT)
+        if not ajout:
+            self._csv.writeheader()
+
+    def ajouter(self, valeur_joueur: ValeurJoueur):
+        ligne = {champ: getattr(valeur_joueur, champ) for champ in CHAMPS_RESULTAT}
+        with self._verrou:
+            self._csv.writerow(ligne)
+            self._fichier.flush()
+            os.fsync(self._fichier.fileno())
+
+    def fermer(self):
+        if self._fichier:
+            self._fichier.close()
+            self._fichier = None
+
+    def ecrire_classeur(self, sortie: pd.DataFrame):
+        ecrire_xlsx(sortie[COLONNES_SORTIE], self.fichier_sortie,
+                    lignes_surlignees=sortie["CONTROLE"].eq("A verifier"))
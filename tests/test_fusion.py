@@ -0,0 +1,38 @@
+import pandas as pd
+
+from fusion import normaliser_dates_fr
+
+
+# Résultats de l'ancienne conversion cellule par cellule (convertir_date puis
+# formater_date_fr), sauf le format avec heure que celle-ci ne reconnaissait pas.
+CAS_DATES = [
+    ("25 août 1996", "25 août 1996"),
+    ("1600-01-01", "1 janvier 1600"),
+    ("0001-01-01", "1 janvier 1"),
+    ("9999-12-31", "31 décembre 9999"),
+    ("12.05.1700", "12 mai 1700"),
+    ("29/02/2000", "29 février 2000"),
+    ("2000-02-01 00:00:00", "1 février 2000"),
+    ("29/02/2001", None),
+    ("", None),
+    ("   ", None),
+    (None, None),
+    ("n'importe quoi", None),
+]
+
+
+def test_normaliser_dates_fr_valeurs_limites():
+    dates = pd.Series([date for date, _ in CAS_DATES], dtype=object)
+    resultat = normaliser_dates_fr(dates)
+    for (date, attendu), obtenu in zip(CAS_DATES, resultat):
+        if attendu is None:
+            assert pd.isna(obtenu), date
+        else:
+            assert obtenu == attendu, date
+
+
+def test_normaliser_dates_fr_conserve_index_et_doublons():
+    dates = pd.Series(["1 janvier 1600", "01/02/2003", "1 janvier 1600"], index=[10, 20, 30])
+    resultat = normaliser_dates_fr(dates)
+    assert resultat.index.tolist() == [10, 20, 30]
+    assert resultat.tolist() == ["1 janvier 1600", "1 février 2003", "1 janvier 1600"]
@@ -0,0 +1,67 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from moteurs import ChallengeDetecte, MoteurHTTP
+
+
+PAGE_NORMALE = """<html><head><title>Kylian Mbappé - Profil du joueur | Transfermarkt</title>
+<script src="/cdn-cgi/challenge-platform/scripts/jsd/main.js"></script></head>
+<body><table class="items"><tr><td>Kylian Mbappé</td></tr></table>
+<footer>Protégé par reCAPTCHA : les règles de confidentialité et les conditions
+d'utilisation de Google s'appliquent. Access denied ? Contactez-nous.</footer></body></html>"""
+
+PAGE_CHALLENGE = """<html><head><title>Just a moment...</title></head>
+<body><form id="challenge-form" action="/?__cf_chl_f_tk=abc" method="POST"></form></body></html>"""
+
+PAGE_INCAPSULA = """<html><head><meta name="robots" content="noindex"></head>
+<body><iframe src="/_Incapsula_Resource?SWUDNSAI=31"></iframe>
+Request unsuccessful. Incapsula incident ID: 1234</body></html>"""
+
+
+class _Gestionnaire(BaseHTTPRequestHandler):
+    REPONSES = {
+        "/": (200, PAGE_NORMALE),
+        "/normale": (200, PAGE_NORMALE),
+        "/challenge": (200, PAGE_CHALLENGE),
+        "/incapsula": (200, PAGE_INCAPSULA),
+        "/403": (403, "Forbidden"),
+        "/429": (429, "Too Many Requests"),
+        "/503": (503, "Service Unavailable"),
+    }
+
+    def do_GET(self):
+        statut, corps = self.REPONSES.get(self.path, (404, "Not Found"))
+        donnees = corps.encode("utf-8")
+        self.send_response(statut)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(donnees)))
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def moteur():
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), _Gestionnaire)
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    moteur = MoteurHTTP(f"http://127.0.0.1:{serveur.server_port}", timeout=5)
+    yield moteur
+    moteur.fermer()
+    serveur.shutdown()
+    serveur.server_close()
+
+
+def test_page_normale(moteur):
+    html = moteur.obtenir_html(f"{moteur.base_url}/normale")
+    assert 'class="items"' in html
+
+
+@pytest.mark.parametrize("chemin", ["/challenge", "/incapsula", "/403", "/429", "/503"])
+def test_challenge_detecte(moteur, chemin):
+    with pytest.raises(ChallengeDetecte):
+        moteur.obtenir_html(f"{moteur.base_url}{chemin}")
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from selectolax.parser import HTMLParser
+
+from normalisation import normaliser_nom
+from players import ScraperTransferMarkt
+
+
+PAGES = Path(__file__).parent / "pages"
+
+
+def lire_page(nom: str) -> str:
+    return (PAGES / nom).read_text(encoding="utf-8")
+
+
+@pytest.fixture
+def scraper_hors_reseau(tmp_path, monkeypatch):
+    # Les caches SQLite sont créés dans le répertoire courant
+    monkeypatch.chdir(tmp_path)
+    scraper = ScraperTransferMarkt(moteur="http", base_url="http://127.0.0.1:9",
+                                   cache_pages=False, index_local=False)
+    yield scraper
+    scraper.cache.fermer()
+    scraper.fermer()
+
+
+def test_lignes_resultats_ignorent_les_tableaux_imbriques(scraper_hors_reseau):
+    table = HTMLParser(lire_page("recherche_zinedine_zidane.html")).css_first("table.items")
+    lignes = [scraper_hors_reseau._extraire_ligne_resultat(ligne)
+              for ligne in scraper_hors_reseau._lignes_resultats(table)]
+    lignes = [ligne for ligne in lignes if ligne]
+
+    assert [ligne['url_details'] for ligne in lignes] == [
+        "http://127.0.0.1:9/zinedine-zidane/profil/spieler/3111",
+        "http://127.0.0.1:9/enzo-zidane/profil/spieler/523914",
+    ]
+    zidane, enzo = (ligne['resultat'] for ligne in lignes)
+    assert (zidane['statut'], zidane['valeur']) == ("Fin de carrière", -1)
+    assert (enzo['statut'], enzo['valeur']) == ("actif", 0.15)
+    assert enzo['position'] == "Milieu offensif"
+
+
+def test_ordonner_noms_accepte_une_cellule_vide(scraper_hors_reseau):
+    # pd.read_excel renvoie NaN pour une cellule NOM vide
+    vide = float("nan")
+    groupes = {vide: [vide], "Zinedine Zidane": ["Zinedine Zidane"], "Abc": ["Abc"]}
+    ordre = scraper_hors_reseau._ordonner_noms(groupes)
+    assert ordre[0] is vide
+    assert sorted(ordre[1:]) == ["Abc", "Zinedine Zidane"]
+
+
+class _SiteEnregistre(BaseHTTPRequestHandler):
+    """Sert les pages enregistrées : une page de recherche par requête connue, vide sinon."""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        chemin = PAGES / "recherche_vide.html"
+        if url.path == ScraperTransferMarkt.CHEMIN_RECHERCHE:
+            requete = normaliser_nom(parse_qs(url.query).get("query", [""])[0])
+            page = PAGES / f"recherche_{'_'.join(requete.split())}.html"
+            if page.exists():
+                chemin = page
+        elif "/profil/spieler/" in url.path:
+            chemin = PAGES / f"joueur_{url.path.rsplit('/', 1)[-1]}.html"
+
+        if not chemin.exists():
+            self.send_error(404)
+            return
+        donnees = chemin.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(donnees)))
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def site():
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), _SiteEnregistre)
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{serveur.server_port}"
+    serveur.shutdown()
+    serveur.server_close()
+
+
+NOMS_LOT = ["Kylian Mbappé", "KYLIAN MBAPPE", "Zinedine Zidane", "", float("nan"),
+            "Inconnu Totalement"]
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_lot_sur_pages_enregistrees(site, tmp_path, monkeypatch, mode):
+    monkeypatch.chdir(tmp_path)
+    scraper = ScraperTransferMarkt(moteur="http", base_url=site, debit_requetes=200,
+                                   max_tentatives=0)
+    try:
+        if mode == "sync":
+            resultats = scraper.recuperer_valeurs_joueurs(NOMS_LOT)
+        else:
+            resultats = asyncio.run(scraper.recuperer_valeurs_joueurs_async(NOMS_LOT))
+    finally:
+        scraper.cache.fermer()
+        scraper.fermer()
+
+    mbappe = resultats["Kylian Mbappé"]
+    assert (mbappe.nom_transfermarkt, mbappe.valeur, mbappe.statut) == ("Kylian Mbappé", 180.0, "actif")
+    assert mbappe.url_details == f"{site}/kylian-mbappe/profil/spieler/342229"
+    assert (mbappe.date_naissance, mbappe.fin_contrat) == ("20 déc. 1998", "30 juin 2029")
+    assert mbappe.erreur is None
+
+    # Orthographe en double : même résultat, recopié sans nouvelle recherche
+    doublon = resultats["KYLIAN MBAPPE"]
+    assert (doublon.url_details, doublon.valeur) == (mbappe.url_details, mbappe.valeur)
+
+    zidane = resultats["Zinedine Zidane"]
+    assert (zidane.statut, zidane.valeur, zidane.fin_contrat) == ("Fin de carrière", -1, "fin de carriere")
+    assert zidane.date_naissance == "23 juin 1972"
+
+    assert resultats[""].controle == "A verifier"
+    nan = next(nom for nom in resultats if isinstance(nom, float))
+    assert resultats[nan].erreur is not None
+    assert resultats["Inconnu Totalement"].erreur is not None
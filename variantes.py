@@ -0,0 +1,50 @@
+from typing import List
+
+
+MAX_VARIANTES = 8
+LONGUEUR_MIN_TOKEN = 3
+
+
+def planifier_variantes(nom_joueur: str, max_variantes: int = MAX_VARIANTES) -> List[str]:
+    """
+    Retourne les requêtes de recherche d'un nom, de la plus probable à la moins probable.
+
+    L'ordre suit ce qui correspond le plus souvent sur Transfermarkt : nom complet,
+    nom de famille en tête, ordre inversé, prénom + nom, puis les tokens seuls du
+    plus long au plus court. La liste est dédoublonnée et limitée à `max_variantes`.
+    """
+    noms = [nom for nom in nom_joueur.split() if nom]
+    if not noms:
+        return []
+
+    candidats = [" ".join(noms)]
+
+    if len(noms) > 1:
+        candidats.append(" ".join([noms[-1]] + noms[:-1]))
+        candidats.append(" ".join(noms[::-1]))
+        candidats.append(f"{noms[0]} {noms[-1]}")
+        candidats.append(f"{noms[-1]} {noms[0]}")
+
+        if len(noms) > 2:
+            candidats.append(" ".join(noms[-2:]))
+            candidats.append(" ".join(noms[1:]))
+
+        tokens_longs = sorted(
+            (nom for nom in noms if len(nom) >= LONGUEUR_MIN_TOKEN),
+            key=len, reverse=True)
+        candidats.extend(tokens_longs)
+
+        for i in range(len(noms) - 1):
+            candidats.append(f"{noms[i]} {noms[i + 1]}")
+
+    return list(dict.fromkeys(candidats))[:max_variantes]
+
+
+def compter_variantes_exhaustives(nombre_tokens: int) -> int:
+    """Nombre de requêtes produites par l'ancienne énumération de toutes les permutations."""
+    total = 0
+    arrangements = 1
+    for taille in range(1, nombre_tokens + 1):
+        arrangements *= nombre_tokens - taille + 1
+        total += arrangements
+    return total